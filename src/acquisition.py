@@ -0,0 +1,141 @@
+import _thread
+import asyncio
+import time
+from array import array
+
+from clock import sleep_us
+
+try:
+    ThreadSafeFlag = asyncio.ThreadSafeFlag  # type: ignore
+except AttributeError:
+
+    class ThreadSafeFlag:
+        # CPython, when running on the host: the producer is a real thread
+        # there, and an Event has to be set from the event loop's thread
+        def __init__(self) -> None:
+            self.event = asyncio.Event()
+            self.loop = None
+
+        def set(self):
+            if self.loop is None or self.loop.is_closed():
+                self.event.set()
+            else:
+                self.loop.call_soon_threadsafe(self.event.set)
+
+        def clear(self):
+            self.event.clear()
+
+        async def wait(self):
+            self.loop = asyncio.get_running_loop()
+            await self.event.wait()
+
+
+class ThreadedAcquisition:
+    # Runs the sampling loop on its own thread (the second core on the RP2040,
+    # a plain thread on CPython). Frames are exchanged with the consumer by
+    # triple buffering, so neither side ever waits for the other to finish
+    # reading or writing a frame: the lock only guards the buffer swaps.
+    def __init__(
+        self,
+        number_of_samples: int,
+        sample_value_reader,
+        sample_delay: float = 0,
+        sample_source=None,
+        frame_observer=None,
+    ) -> None:
+        self.number_of_samples = number_of_samples
+        self.sample_value_reader = sample_value_reader
+        self.sample_delay = sample_delay
+        self.sample_source = sample_source
+        # called on this thread with every frame, dropped ones included; a
+        # true result marks the frame, which is then kept until taken rather
+        # than dropped for a later one
+        self.frame_observer = frame_observer
+
+        self.write_buffer = array("H", [0] * number_of_samples)
+        self.ready_buffer = array("H", [0] * number_of_samples)
+        self.read_buffer = array("H", [0] * number_of_samples)
+
+        self.lock = _thread.allocate_lock()
+        # set by the producer when a frame is ready or sampling has paused,
+        # for the consumer to await instead of polling
+        self.frame_flag = ThreadSafeFlag()
+        self.frame_ready = False
+        self.ready_marked = False
+        self.read_marked = False
+        self.frames_acquired = 0
+        self.frames_dropped = 0
+
+        self.running = False
+        self.stopped = True
+        self.paused = False
+        self.idle = False
+
+    def start(self):
+        self.running = True
+        self.stopped = False
+        _thread.start_new_thread(self.acquisition_loop, ())
+
+    def stop(self):
+        self.running = False
+
+    def pause(self):
+        # the sampler has let go of the ADC once idle is set
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def acquisition_loop(self):
+        while self.running:
+            if self.paused:
+                if not self.idle:
+                    self.idle = True
+                    self.frame_flag.set()
+                time.sleep(0.01)
+                continue
+            self.idle = False
+            self.read_frame(self.write_buffer)
+            marked = False
+            if self.frame_observer is not None:
+                marked = self.frame_observer(self.write_buffer)
+            with self.lock:
+                self.frames_acquired += 1
+                if self.frame_ready and self.ready_marked:
+                    self.frames_dropped += 1
+                    continue
+                self.write_buffer, self.ready_buffer = (
+                    self.ready_buffer,
+                    self.write_buffer,
+                )
+                if self.frame_ready:
+                    self.frames_dropped += 1
+                self.frame_ready = True
+                self.ready_marked = bool(marked)
+            self.frame_flag.set()
+        self.stopped = True
+
+    def read_frame(self, buffer):
+        if self.sample_source is not None:
+            self.sample_source.read_into(buffer)
+            return
+
+        sample_value_reader = self.sample_value_reader
+        # time.sleep would round the delay down to whole milliseconds
+        sample_delay_us = int(self.sample_delay * 1_000_000)
+        for index in range(self.number_of_samples):
+            buffer[index] = sample_value_reader()
+            if sample_delay_us:
+                sleep_us(sample_delay_us)
+
+    def take_frame(self) -> bool:
+        # on success the latest complete frame is in read_buffer, which stays
+        # untouched by the producer until the next take_frame call, and
+        # read_marked tells whether the frame observer marked it
+        with self.lock:
+            if not self.frame_ready:
+                return False
+            self.read_buffer, self.ready_buffer = self.ready_buffer, self.read_buffer
+            self.read_marked = self.ready_marked
+            self.frame_ready = False
+        return True
@@ -0,0 +1,90 @@
+from array import array
+
+AVERAGE_RUNNING = "running"
+AVERAGE_EXPONENTIAL = "exponential"
+
+
+class FrameAverager:
+    # Averages trigger aligned windows of `columns` samples, each taken from a
+    # frame of frame_samples samples, the extra ones giving room to look for
+    # the trigger. Per column sums are kept in place in an array('I'): the
+    # running average publishes the mean of every `frames` frames, the
+    # exponential one publishes on every frame, a new frame weighing 2**-shift.
+    # After auto_frames frames in a row without a trigger, windows start at
+    # the beginning of the frame, so that untriggered signals still show.
+    def __init__(
+        self,
+        columns: int,
+        trigger,
+        mode: str = AVERAGE_RUNNING,
+        frames: int = 8,
+        shift: int = 3,
+        search_samples: int = 0,
+        auto_frames: int = 4,
+    ) -> None:
+        self.columns = columns
+        self.trigger = trigger
+        self.mode = mode
+        self.frames = frames
+        self.shift = shift
+        self.auto_frames = auto_frames
+        self.frame_samples = columns + (search_samples or columns)
+
+        self.accumulator = array("I", bytes(4 * columns))
+        self.average = array("H", bytes(2 * columns))
+        self.count = 0
+        self.untriggered_run = 0
+        self.frames_untriggered = 0
+
+    def reset(self):
+        self.count = 0
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        self.reset()
+
+    def add_frame(self, samples) -> bool:
+        # True once a new average is available in self.average
+        columns = self.columns
+        start = self.trigger.find(samples, len(samples) - columns)
+        if start < 0:
+            self.frames_untriggered += 1
+            self.untriggered_run += 1
+            if self.untriggered_run < self.auto_frames:
+                return False
+            start = 0
+        else:
+            self.untriggered_run = 0
+
+        accumulator = self.accumulator
+        average = self.average
+        if self.mode == AVERAGE_EXPONENTIAL:
+            shift = self.shift
+            if not self.count:
+                for column in range(columns):
+                    accumulator[column] = samples[start + column] << shift
+                self.count = 1
+            else:
+                for column in range(columns):
+                    accumulator[column] += samples[start + column] - (
+                        accumulator[column] >> shift
+                    )
+            for column in range(columns):
+                average[column] = accumulator[column] >> shift
+            return True
+
+        if not self.count:
+            for column in range(columns):
+                accumulator[column] = samples[start + column]
+        else:
+            for column in range(columns):
+                accumulator[column] += samples[start + column]
+        self.count += 1
+        if self.count < self.frames:
+            return False
+
+        frames = self.frames
+        for column in range(columns):
+            average[column] = accumulator[column] // frames
+        self.count = 0
+        return True
@@ -0,0 +1,65 @@
+import framebuf  # type: ignore
+
+
+class Background:
+    # The static part of the screen (border, labels, graticule), drawn once
+    # into a MONO_VLSB buffer of its own. The plot is cleared by copying the
+    # background back over it: whole regions through memoryview slices of
+    # page rows prepared in advance, single columns a byte per page.
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.buffer = bytearray(width * height // 8)
+        self.frame_buffer = framebuf.FrameBuffer(
+            self.buffer, width, height, framebuf.MONO_VLSB
+        )
+        self.region_slices = []
+
+    def draw_graticule(
+        self,
+        left: int,
+        top: int,
+        bottom: int,
+        columns: int,
+        horizontal_divisions: int = 4,
+        vertical_divisions: int = 6,
+        dot_spacing: int = 4,
+    ):
+        # dotted division lines inside the plot, with level ticks left of it
+        frame_buffer = self.frame_buffer
+        for division in range(1, horizontal_divisions):
+            y = bottom - division * (bottom - top) // horizontal_divisions
+            frame_buffer.hline(left - 3, y, 2, 1)
+            for x in range(left, left + columns, dot_spacing):
+                frame_buffer.pixel(x, y, 1)
+        for division in range(1, vertical_divisions):
+            x = left + division * columns // vertical_divisions
+            for y in range(bottom, top - 1, -dot_spacing):
+                frame_buffer.pixel(x, y, 1)
+
+    def set_region(self, target_buffer, left: int, top: int, bottom: int, columns: int):
+        # the rows outside top..bottom on the first and last page are
+        # restored as well, so they must hold only background content
+        target = memoryview(target_buffer)
+        source = memoryview(self.buffer)
+        self.region_slices = []
+        for page in range(top >> 3, (bottom >> 3) + 1):
+            start = page * self.width + left
+            self.region_slices.append(
+                (target[start : start + columns], source[start : start + columns])
+            )
+
+    def restore_region(self):
+        for target, source in self.region_slices:
+            target[:] = source
+
+    def restore_column(self, target_buffer, x: int, top: int, bottom: int):
+        source = self.buffer
+        width = self.width
+        for index in range(
+            (top >> 3) * width + x, (bottom >> 3) * width + x + 1, width
+        ):
+            target_buffer[index] = source[index]
+
+    def restore_all(self, target_buffer):
+        target_buffer[:] = self.buffer
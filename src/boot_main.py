@@ -0,0 +1,5 @@
+# main.py of precompiled builds (make build-mpy): the application itself is
+# loaded from adc_monitor.mpy
+from adc_monitor import run
+
+run()
@@ -0,0 +1,113 @@
+from array import array
+
+from clock import sleep_us
+
+NOMINAL_VREF_MV = 3300
+CALIBRATION_MAGIC = b"CAL1"
+
+
+def code_to_u16(code: int) -> int:
+    # 12 bit ADC code to the read_u16 scale, as the rp2 port does it
+    return code << 4 | code >> 8
+
+
+def to_millivolts(value: int, vref_mv: int = NOMINAL_VREF_MV) -> int:
+    return value * vref_mv >> 16
+
+
+def measure_reference(sample_value_reader, samples: int = 256, delay_us: int = 20):
+    # mean reading of a steady input, on the read_u16 scale
+    total = 0
+    for _ in range(samples):
+        total += sample_value_reader()
+        sleep_us(delay_us)
+    return total // samples
+
+
+class Calibration:
+    # Correction of the ADC transfer curve (offset, gain, nonlinearity) as a
+    # 4096 entry lookup table indexed by the 12 bit code, holding corrected
+    # read_u16-scaled values. Files keep one signed byte per code, the
+    # correction in codes, so a table takes 4 KiB of flash.
+    def __init__(self, vref_mv: int = NOMINAL_VREF_MV) -> None:
+        self.vref_mv = vref_mv
+        self.lut = array("H", [code_to_u16(code) for code in range(4096)])
+
+    @classmethod
+    def from_points(cls, points, vref_mv: int = NOMINAL_VREF_MV):
+        # points: (read_u16 reading, millivolts) pairs measured on known
+        # references, at least two; the curve is interpolated linearly
+        # between them and extrapolated past the first and last one
+        points = sorted(points)
+        calibration = cls(vref_mv)
+        lut = calibration.lut
+        segment = 0
+        for code in range(4096):
+            value = code_to_u16(code)
+            while segment < len(points) - 2 and value > points[segment + 1][0]:
+                segment += 1
+            reading_low, millivolts_low = points[segment]
+            reading_high, millivolts_high = points[segment + 1]
+            millivolts = millivolts_low + (value - reading_low) * (
+                millivolts_high - millivolts_low
+            ) / (reading_high - reading_low)
+            lut[code] = max(0, min(0xFFFF, int(millivolts * 65535 / vref_mv)))
+        return calibration
+
+    @classmethod
+    def from_curve_file(cls, path: str, vref_mv: int = NOMINAL_VREF_MV):
+        # "reading,millivolts" lines, as measured by an external procedure
+        points = []
+        with open(path) as curve_file:
+            for line in curve_file:
+                fields = line.strip().split(",")
+                if len(fields) == 2:
+                    points.append((int(fields[0]), float(fields[1])))
+        return cls.from_points(points, vref_mv)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as calibration_file:
+            data = calibration_file.read()
+        if data[:4] != CALIBRATION_MAGIC or len(data) != 6 + 4096:
+            raise ValueError("not a calibration file")
+
+        calibration = cls(data[4] | data[5] << 8)
+        lut = calibration.lut
+        for code in range(4096):
+            delta = data[6 + code]
+            if delta > 127:
+                delta -= 256
+            lut[code] = code_to_u16(max(0, min(4095, code + delta)))
+        return calibration
+
+    def save(self, path: str):
+        data = bytearray(6 + 4096)
+        data[:4] = CALIBRATION_MAGIC
+        data[4] = self.vref_mv & 0xFF
+        data[5] = self.vref_mv >> 8
+        lut = self.lut
+        for code in range(4096):
+            delta = max(-128, min(127, (lut[code] >> 4) - code))
+            data[6 + code] = delta & 0xFF
+        with open(path, "wb") as calibration_file:
+            calibration_file.write(data)
+
+    def correct(self, value: int) -> int:
+        return self.lut[value >> 4]
+
+    def reader(self, sample_value_reader):
+        lut = self.lut
+
+        def read_corrected():
+            return lut[sample_value_reader() >> 4]
+
+        return read_corrected
+
+    def correct_into(self, buffer):
+        lut = self.lut
+        for index in range(len(buffer)):
+            buffer[index] = lut[buffer[index] >> 4]
+
+    def millivolts(self, value: int) -> int:
+        return to_millivolts(value, self.vref_mv)
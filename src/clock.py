@@ -0,0 +1,27 @@
+import time
+
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, sleep_us  # type: ignore
+
+    # MicroPython counts ticks from reset
+    BOOT_TICKS_MS = 0
+except ImportError:
+    # CPython stand-ins, so that timing code also runs on the host
+
+    def ticks_ms():
+        return time.perf_counter_ns() // 1_000_000
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1_000
+
+    def ticks_diff(ticks1, ticks2):
+        return ticks1 - ticks2
+
+    def sleep_us(us):
+        time.sleep(us / 1_000_000)
+
+    BOOT_TICKS_MS = ticks_ms()
+
+
+def ms_since_boot() -> int:
+    return ticks_diff(ticks_ms(), BOOT_TICKS_MS)
@@ -0,0 +1,43 @@
+from machine import ADC, Pin  # type: ignore
+
+from clock import ticks_us, ticks_diff
+from sample_codec import encode_frame, encoded_frame_size_bound
+from sample_logger import raw_frame_size, write_raw_frame
+
+
+def benchmark_frame_writer(frame_writer, frames, buffer):
+    total_bytes = 0
+    total_us = 0
+    for frame in frames:
+        start = ticks_us()
+        size = frame_writer(frame, buffer, 0)
+        total_us += ticks_diff(ticks_us(), start)
+        total_bytes += size
+    return total_bytes, total_us
+
+
+def run_benchmark(number_of_frames: int = 50, number_of_samples: int = 118):
+    adc = ADC(Pin(26))
+    frames = [
+        [adc.read_u16() for _ in range(number_of_samples)]
+        for _ in range(number_of_frames)
+    ]
+    buffer = bytearray(
+        max(
+            raw_frame_size(number_of_samples),
+            encoded_frame_size_bound(number_of_samples),
+        )
+    )
+    total_samples = number_of_frames * number_of_samples
+
+    for name, frame_writer in (("raw", write_raw_frame), ("encoded", encode_frame)):
+        total_bytes, total_us = benchmark_frame_writer(frame_writer, frames, buffer)
+        print(
+            "{}: {:.2f} bytes/sample, {} us/frame".format(
+                name, total_bytes / total_samples, total_us // number_of_frames
+            )
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,196 @@
+import asyncio
+import sys
+
+from memory_monitor import mem_free
+
+HELP_LINES = (
+    "get <name> | set <name> <value> | list",
+    "stats | dump | profile | memory | events | rearm | reset_hold | help",
+    "zoom <steps> | pan <columns> | recapture",
+)
+
+
+async def open_stdin_reader():
+    if sys.implementation.name == "micropython":
+        return asyncio.StreamReader(sys.stdin)  # type: ignore
+
+    # CPython, when running on the host
+    reader = asyncio.StreamReader()
+    await asyncio.get_event_loop().connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    return reader
+
+
+class CommandChannel:
+    # Line based commands on the USB serial console (stdin), read by an
+    # asyncio task, so the acquisition and draw loops go on meanwhile. Every
+    # reply ends with a line of its own: "ok" or "error: <reason>".
+    def __init__(self, monitor) -> None:
+        self.monitor = monitor
+        self.parameters = {
+            "adc_delay": (
+                lambda: monitor.adc_delay,
+                lambda value: monitor.set_adc_delay(float(value)),
+            ),
+            "adc_pin": (
+                lambda: monitor.adc_gpio_pin,
+                lambda value: monitor.set_adc_gpio_pin(int(value)),
+            ),
+            "fps": (
+                lambda: 1000 // monitor.frame_scheduler.frame_period_ms,
+                lambda value: monitor.frame_scheduler.set_target_fps(int(value)),
+            ),
+            "trace_mode": (lambda: monitor.trace_mode, monitor.set_trace_mode),
+            "display_mode": (lambda: monitor.display_mode, monitor.set_display_mode),
+            "scale": (
+                lambda: monitor.scale_shift,
+                lambda value: monitor.set_scale_shift(int(value)),
+            ),
+            "hold": (
+                lambda: int(monitor.peak_hold is not None),
+                lambda value: monitor.set_peak_hold(bool(int(value))),
+            ),
+            "trend_level": (
+                lambda: monitor.trend_level,
+                lambda value: monitor.set_trend_level(int(value)),
+            ),
+        }
+        if monitor.averager is not None:
+            self.parameters["trigger"] = (
+                lambda: monitor.averager.trigger.level,
+                lambda value: monitor.set_trigger_level(int(value)),
+            )
+        self.commands_executed = 0
+
+    def execute(self, line: str):
+        # the reply lines for a command line
+        words = line.split()
+        if not words:
+            return []
+
+        self.commands_executed += 1
+        command = words[0]
+        try:
+            if command == "get" and len(words) == 2:
+                lines = ["{} {}".format(words[1], self.parameter(words[1])[0]())]
+            elif command == "set" and len(words) == 3:
+                self.parameter(words[1])[1](words[2])
+                lines = []
+            elif command == "list":
+                lines = [
+                    "{} {}".format(name, getter())
+                    for name, (getter, _) in self.parameters.items()
+                ]
+            elif command == "stats":
+                lines = self.statistics_lines()
+            elif command == "dump":
+                lines = [
+                    ",".join(str(value) for value in self.monitor.frame_raw_values)
+                ]
+            elif command == "profile":
+                if self.monitor.profiler is None:
+                    raise ValueError("no profiler")
+                self.monitor.profiler.dump()
+                lines = []
+            elif command == "memory":
+                if self.monitor.memory_monitor is None:
+                    raise ValueError("no memory monitor")
+                self.monitor.memory_monitor.print_report()
+                lines = []
+            elif command == "events":
+                lines = self.event_detector().event_lines()
+            elif command == "rearm":
+                self.event_detector()
+                self.monitor.rearm_event_detector()
+                lines = []
+            elif command == "reset_hold":
+                if self.monitor.peak_hold is None:
+                    raise ValueError("no peak hold")
+                self.monitor.reset_peak_hold()
+                lines = []
+            elif command == "zoom" and len(words) == 2:
+                self.deep_capture()
+                self.monitor.zoom_deep_capture(int(words[1]))
+                lines = []
+            elif command == "pan" and len(words) == 2:
+                self.deep_capture()
+                self.monitor.pan_deep_capture(int(words[1]))
+                lines = []
+            elif command == "recapture":
+                self.deep_capture()
+                self.monitor.rearm_deep_capture()
+                lines = []
+            elif command == "help":
+                lines = list(HELP_LINES)
+            else:
+                return ["error: unknown command"]
+        except ValueError as error:
+            return ["error: {}".format(error)]
+
+        lines.append("ok")
+        return lines
+
+    def parameter(self, name: str):
+        if name not in self.parameters:
+            raise ValueError("unknown parameter {}".format(name))
+        return self.parameters[name]
+
+    def event_detector(self):
+        if self.monitor.event_detector is None:
+            raise ValueError("no event detector")
+        return self.monitor.event_detector
+
+    def deep_capture(self):
+        if self.monitor.deep_capture is None:
+            raise ValueError("no deep capture")
+        return self.monitor.deep_capture
+
+    def statistics_lines(self):
+        monitor = self.monitor
+        frame_scheduler = monitor.frame_scheduler
+        lines = [
+            "frames drawn {} unchanged {} skipped {}".format(
+                frame_scheduler.frames_drawn,
+                frame_scheduler.frames_unchanged,
+                frame_scheduler.frames_skipped,
+            )
+        ]
+        if monitor.acquisition is not None:
+            lines.append(
+                "acquired {} dropped {}".format(
+                    monitor.acquisition.frames_acquired,
+                    monitor.acquisition.frames_dropped,
+                )
+            )
+        if monitor.averager is not None:
+            lines.append("untriggered {}".format(monitor.averager.frames_untriggered))
+        if monitor.event_detector is not None:
+            lines.append(
+                "events {} frozen {}".format(
+                    monitor.event_detector.events_detected, monitor.display_frozen
+                )
+            )
+        if monitor.sample_logger is not None:
+            lines.append(
+                "logged {} dropped {} bytes {}".format(
+                    monitor.sample_logger.frames_logged,
+                    monitor.sample_logger.frames_dropped,
+                    monitor.sample_logger.bytes_written,
+                )
+            )
+        if monitor.stream_server is not None:
+            lines.append("published {}".format(monitor.stream_server.frames_published))
+        lines.append("free {}".format(mem_free()))
+        return lines
+
+    async def run(self):
+        reader = await open_stdin_reader()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if isinstance(line, bytes):
+                line = line.decode()
+            for reply_line in self.execute(line):
+                print(reply_line)
@@ -0,0 +1,126 @@
+from machine import Pin  # type: ignore
+import micropython  # type: ignore
+
+import asyncio
+
+from clock import ticks_ms, ticks_diff
+
+try:
+    ThreadSafeFlag = asyncio.ThreadSafeFlag  # type: ignore
+except AttributeError:
+    # CPython: events are queued from the event loop thread anyway
+    ThreadSafeFlag = asyncio.Event
+
+EVENT_NONE = 0
+EVENT_MODE = 1
+EVENT_SELECT = 2
+EVENT_UP = 3
+EVENT_DOWN = 4
+
+# quadrature steps indexed by previous state << 2 | new state, each state
+# being a << 1 | b; impossible transitions (bounces) count as no step
+ENCODER_STEPS = (0, -1, 1, 0, 1, 0, 0, -1, -1, 0, 0, 1, 0, 1, -1, 0)
+
+
+class InputQueue:
+    # Ring of event codes, filled by scheduled callbacks and drained by an
+    # asyncio task woken through a ThreadSafeFlag; events arriving while the
+    # ring is full are dropped.
+    def __init__(self, size: int = 16) -> None:
+        self.events = bytearray(size)
+        self.head = 0
+        self.tail = 0
+        self.flag = ThreadSafeFlag()
+        self.events_dropped = 0
+
+    def put(self, event: int):
+        next_head = (self.head + 1) % len(self.events)
+        if next_head == self.tail:
+            self.events_dropped += 1
+            return
+        self.events[self.head] = event
+        self.head = next_head
+        self.flag.set()
+
+    def get(self) -> int:
+        if self.tail == self.head:
+            return EVENT_NONE
+        event = self.events[self.tail]
+        self.tail = (self.tail + 1) % len(self.events)
+        return event
+
+    async def wait(self):
+        # the caller drains the whole ring once woken
+        await self.flag.wait()
+        self.flag.clear()
+
+
+class Button:
+    # Active low push button. The IRQ handler only schedules; the scheduled
+    # call drops edges closer than debounce_ms to the last accepted press, or
+    # found with the button already released, and queues the event.
+    def __init__(
+        self, gpio_pin: int, event: int, queue: InputQueue, debounce_ms: int = 30
+    ) -> None:
+        self.event = event
+        self.queue = queue
+        self.debounce_ms = debounce_ms
+        self.last_press = ticks_ms()
+        # bound once: the IRQ handler must not allocate
+        self.scheduled_press = self.press
+        self.pin = Pin(gpio_pin, Pin.IN, Pin.PULL_UP)
+        self.pin.irq(handler=self.irq, trigger=Pin.IRQ_FALLING)
+
+    def irq(self, pin):
+        try:
+            micropython.schedule(self.scheduled_press, 0)
+        except RuntimeError:
+            # the schedule queue is full: the press is lost
+            pass
+
+    def press(self, _):
+        now = ticks_ms()
+        if ticks_diff(now, self.last_press) < self.debounce_ms or self.pin.value():
+            return
+        self.last_press = now
+        self.queue.put(self.event)
+
+
+class RotaryEncoder:
+    # Quadrature encoder on two active low pins. The IRQ handler decodes the
+    # transition table, which rejects bounces, and schedules an EVENT_UP or
+    # EVENT_DOWN for every detent.
+    def __init__(
+        self,
+        gpio_pin_a: int,
+        gpio_pin_b: int,
+        queue: InputQueue,
+        steps_per_detent: int = 4,
+    ) -> None:
+        self.queue = queue
+        self.steps_per_detent = steps_per_detent
+        self.steps = 0
+        self.scheduled_put = queue.put
+        self.pin_a = Pin(gpio_pin_a, Pin.IN, Pin.PULL_UP)
+        self.pin_b = Pin(gpio_pin_b, Pin.IN, Pin.PULL_UP)
+        self.state = self.pin_a.value() << 1 | self.pin_b.value()
+        trigger = Pin.IRQ_FALLING | Pin.IRQ_RISING
+        self.pin_a.irq(handler=self.irq, trigger=trigger)
+        self.pin_b.irq(handler=self.irq, trigger=trigger)
+
+    def irq(self, pin):
+        state = self.pin_a.value() << 1 | self.pin_b.value()
+        self.steps += ENCODER_STEPS[self.state << 2 | state]
+        self.state = state
+        if self.steps >= self.steps_per_detent:
+            self.steps = 0
+            event = EVENT_UP
+        elif self.steps <= -self.steps_per_detent:
+            self.steps = 0
+            event = EVENT_DOWN
+        else:
+            return
+        try:
+            micropython.schedule(self.scheduled_put, event)
+        except RuntimeError:
+            pass
@@ -0,0 +1,150 @@
+import asyncio
+from array import array
+
+
+def capacity_for_free_memory(
+    free_memory: int, reserve: int = 48 * 1024, max_capacity: int = 32768
+) -> int:
+    # largest power of two capacity whose sample buffer (and the equally
+    # large zero filled initializer) fits in the memory left after reserve
+    capacity = max_capacity
+    while capacity > 1024 and 4 * capacity > free_memory - reserve:
+        capacity >>= 1
+    return capacity
+
+
+class DeepCapture:
+    # A long record of samples in a preallocated array('H'), viewed through a
+    # zoomable, pannable window of `columns` columns. A min/max pyramid, built
+    # once per capture, holds the extremes of aligned blocks of 2**base_shift,
+    # 2**(base_shift + 1), ... samples, so any zoom level needs one lookup per
+    # column (or a scan of fewer than 2**base_shift samples) to render.
+    def __init__(self, capacity: int = 32768, columns: int = 118, base_shift: int = 4):
+        self.capacity = capacity
+        self.columns = columns
+        self.base_shift = base_shift
+        self.samples = array("H", bytes(2 * capacity))
+
+        self.level_offsets = []
+        pyramid_size = 0
+        level_size = capacity >> base_shift
+        while level_size:
+            self.level_offsets.append(pyramid_size)
+            pyramid_size += level_size
+            level_size >>= 1
+        self.pyramid_min = array("H", bytes(2 * pyramid_size))
+        self.pyramid_max = array("H", bytes(2 * pyramid_size))
+
+        self.view_min = array("H", bytes(2 * columns))
+        self.view_max = array("H", bytes(2 * columns))
+
+        self.captured = False
+        self.zoom_shift = 0
+        self.offset = 0
+
+    async def capture(self, sample_value_reader, chunk_size: int = 256):
+        # samples at full speed, yielding to the scheduler between chunks
+        samples = self.samples
+        self.captured = False
+        for chunk_start in range(0, self.capacity, chunk_size):
+            for index in range(
+                chunk_start, min(chunk_start + chunk_size, self.capacity)
+            ):
+                samples[index] = sample_value_reader()
+            await asyncio.sleep(0)
+
+        self.build_pyramid()
+        self.captured = True
+
+    async def capture_from_source(self, sample_source, chunk_size: int = 256):
+        samples = memoryview(self.samples)
+        self.captured = False
+        for chunk_start in range(0, self.capacity, chunk_size):
+            sample_source.read_into(
+                samples[chunk_start : min(chunk_start + chunk_size, self.capacity)]
+            )
+            await asyncio.sleep(0)
+
+        self.build_pyramid()
+        self.captured = True
+
+    def build_pyramid(self):
+        samples = self.samples
+        pyramid_min = self.pyramid_min
+        pyramid_max = self.pyramid_max
+        block_size = 1 << self.base_shift
+
+        for block in range(self.capacity >> self.base_shift):
+            start = block << self.base_shift
+            minimum = maximum = samples[start]
+            for index in range(start + 1, start + block_size):
+                value = samples[index]
+                if value < minimum:
+                    minimum = value
+                elif value > maximum:
+                    maximum = value
+            pyramid_min[block] = minimum
+            pyramid_max[block] = maximum
+
+        for level in range(1, len(self.level_offsets)):
+            source = self.level_offsets[level - 1]
+            target = self.level_offsets[level]
+            for block in range(target - source >> 1):
+                left = source + 2 * block
+                pyramid_min[target + block] = min(
+                    pyramid_min[left], pyramid_min[left + 1]
+                )
+                pyramid_max[target + block] = max(
+                    pyramid_max[left], pyramid_max[left + 1]
+                )
+
+    def max_zoom_shift(self) -> int:
+        zoom_shift = 0
+        while self.columns << (zoom_shift + 1) <= self.capacity:
+            zoom_shift += 1
+        return zoom_shift
+
+    def set_view(self, zoom_shift: int, offset: int):
+        zoom_shift = max(0, min(zoom_shift, self.max_zoom_shift()))
+        # offsets stay aligned to a column, so columns match pyramid blocks
+        offset = max(0, min(offset, self.capacity - (self.columns << zoom_shift)))
+        self.zoom_shift = zoom_shift
+        self.offset = offset >> zoom_shift << zoom_shift
+
+    def zoom(self, steps: int):
+        # positive steps zoom in, keeping the centre of the view in place
+        center = self.offset + (self.columns << self.zoom_shift) // 2
+        zoom_shift = max(0, min(self.zoom_shift - steps, self.max_zoom_shift()))
+        self.set_view(zoom_shift, center - (self.columns << zoom_shift) // 2)
+
+    def pan(self, columns: int):
+        self.set_view(self.zoom_shift, self.offset + (columns << self.zoom_shift))
+
+    def compute_view(self):
+        # fills view_min/view_max, one entry per column
+        view_min = self.view_min
+        view_max = self.view_max
+        zoom_shift = self.zoom_shift
+
+        if zoom_shift >= self.base_shift:
+            level_offset = self.level_offsets[zoom_shift - self.base_shift]
+            first_block = self.offset >> zoom_shift
+            for column in range(self.columns):
+                view_min[column] = self.pyramid_min[level_offset + first_block + column]
+                view_max[column] = self.pyramid_max[level_offset + first_block + column]
+            return
+
+        samples = self.samples
+        samples_per_column = 1 << zoom_shift
+        start = self.offset
+        for column in range(self.columns):
+            minimum = maximum = samples[start]
+            for index in range(start + 1, start + samples_per_column):
+                value = samples[index]
+                if value < minimum:
+                    minimum = value
+                elif value > maximum:
+                    maximum = value
+            view_min[column] = minimum
+            view_max[column] = maximum
+            start += samples_per_column
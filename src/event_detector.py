@@ -0,0 +1,111 @@
+from array import array
+
+from clock import ticks_ms
+
+EVENT_HIGH = 1
+EVENT_LOW = 2
+EVENT_GLITCH = 3
+EVENT_NAMES = ("", "high", "low", "glitch")
+
+LEVEL_NORMAL = 0
+LEVEL_HIGH = 1
+LEVEL_LOW = 2
+
+
+class EventDetector:
+    # Threshold alarms with hysteresis over the sample stream: the level goes
+    # high at a sample >= high and back to normal below high - hysteresis,
+    # and mirrored for low. An excursion back to normal within glitch_samples
+    # samples is also reported as a glitch. Events are kept in a ring of the
+    # latest `size`: kind, sample number, value and ticks_ms of the frame.
+    # Samples within the thresholds take one comparison pair each.
+    def __init__(
+        self,
+        high: int = 0xF000,
+        low: int = 0x1000,
+        hysteresis: int = 0x400,
+        glitch_samples: int = 4,
+        size: int = 32,
+        freeze: bool = False,
+    ) -> None:
+        self.high = high
+        self.low = low
+        self.hysteresis = hysteresis
+        self.glitch_samples = glitch_samples
+        self.freeze = freeze
+
+        self.kinds = bytearray(size)
+        self.sample_numbers = array("L", [0] * size)
+        self.values = array("H", bytes(2 * size))
+        self.times = array("L", [0] * size)
+        self.next_index = 0
+        self.stored = 0
+        self.events_detected = 0
+
+        self.level = LEVEL_NORMAL
+        self.level_start = 0
+        self.sample_number = 0
+
+    def record(self, kind: int, sample_number: int, value: int):
+        index = self.next_index
+        self.kinds[index] = kind
+        self.sample_numbers[index] = sample_number & 0xFFFFFFFF
+        self.values[index] = value
+        self.times[index] = ticks_ms() & 0xFFFFFFFF
+        self.next_index = (index + 1) % len(self.kinds)
+        if self.stored < len(self.kinds):
+            self.stored += 1
+        self.events_detected += 1
+
+    def process_frame(self, samples) -> bool:
+        # True when there was an event in this frame
+        events_detected = self.events_detected
+        high = self.high
+        low = self.low
+        high_release = high - self.hysteresis
+        low_release = low + self.hysteresis
+        level = self.level
+        first_sample = self.sample_number
+        for index in range(len(samples)):
+            value = samples[index]
+            if level == LEVEL_NORMAL:
+                if low < value < high:
+                    continue
+            else:
+                if level == LEVEL_HIGH:
+                    if value >= high_release:
+                        continue
+                elif value <= low_release:
+                    continue
+                level = LEVEL_NORMAL
+                if first_sample + index - self.level_start < self.glitch_samples:
+                    self.record(EVENT_GLITCH, self.level_start, value)
+                # a swing straight across to the other threshold
+                if low < value < high:
+                    continue
+
+            level = LEVEL_HIGH if value >= high else LEVEL_LOW
+            self.level_start = first_sample + index
+            self.record(
+                EVENT_HIGH if level == LEVEL_HIGH else EVENT_LOW,
+                first_sample + index,
+                value,
+            )
+        self.level = level
+        self.sample_number = first_sample + len(samples)
+        return self.events_detected != events_detected
+
+    def event_lines(self):
+        # oldest first
+        lines = []
+        for age in range(self.stored - 1, -1, -1):
+            index = (self.next_index - 1 - age) % len(self.kinds)
+            lines.append(
+                "{} {} {} {}".format(
+                    EVENT_NAMES[self.kinds[index]],
+                    self.sample_numbers[index],
+                    self.values[index],
+                    self.times[index],
+                )
+            )
+        return lines
@@ -0,0 +1,47 @@
+from clock import ticks_ms, ticks_diff
+
+MAX_TARGET_FPS = 1000
+
+
+class FrameScheduler:
+    def __init__(self, target_fps: int = 20, max_idle_shift: int = 3) -> None:
+        self.set_target_fps(target_fps)
+        self.max_idle_shift = max_idle_shift
+
+        self.static_frames = 0
+        self.render_ms = 0
+
+        self.frames_drawn = 0
+        self.frames_unchanged = 0
+        self.frames_skipped = 0
+
+    def set_target_fps(self, target_fps: int):
+        # the frame period is counted in whole milliseconds
+        if not 1 <= target_fps <= MAX_TARGET_FPS:
+            raise ValueError("fps out of range 1..{}".format(MAX_TARGET_FPS))
+        self.frame_period_ms = 1000 // target_fps
+
+    def frame_started(self) -> int:
+        return ticks_ms()
+
+    def frame_finished(self, frame_start: int, changed: bool):
+        self.render_ms = ticks_diff(ticks_ms(), frame_start)
+        if changed:
+            self.static_frames = 0
+            self.frames_drawn += 1
+        else:
+            self.static_frames += 1
+            self.frames_unchanged += 1
+
+    def next_delay_ms(self) -> int:
+        if self.static_frames:
+            # nothing changed on screen: back off exponentially, up to a cap
+            return self.frame_period_ms << min(self.static_frames, self.max_idle_shift)
+
+        if self.render_ms >= self.frame_period_ms:
+            # behind schedule: the frames produced meanwhile are not drawn,
+            # the next one is picked up straight away
+            self.frames_skipped += self.render_ms // self.frame_period_ms
+            return 0
+
+        return self.frame_period_ms - self.render_ms
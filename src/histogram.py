@@ -0,0 +1,64 @@
+from array import array
+
+from vlsb import fill_column_span
+
+
+class Histogram:
+    # Distribution of the latest `window` samples in 2**bin_bits bins. A ring
+    # of bin indices remembers which bin each sample of the window went to,
+    # so a new sample costs one increment and one decrement, and nothing is
+    # rescanned. Bins are selected by shifting the sample, bar heights are
+    # scaled by the smallest shift fitting the fullest bin in the plot.
+    def __init__(self, columns: int, bin_bits: int = 6, window: int = 4096) -> None:
+        self.bin_shift = 16 - bin_bits
+        self.bins = array("H", bytes(2 << bin_bits))
+        self.window_bins = bytearray(window)
+        self.window_position = 0
+        self.window_filled = False
+        # bins grow wider than a column when there are fewer of them
+        self.column_bins = bytes(
+            column * (1 << bin_bits) // columns for column in range(columns)
+        )
+
+    def clear(self):
+        bins = self.bins
+        for index in range(len(bins)):
+            bins[index] = 0
+        self.window_position = 0
+        self.window_filled = False
+
+    def add_frame(self, samples):
+        bins = self.bins
+        window_bins = self.window_bins
+        bin_shift = self.bin_shift
+        position = self.window_position
+        window_filled = self.window_filled
+        for index in range(len(samples)):
+            sample_bin = samples[index] >> bin_shift
+            if window_filled:
+                bins[window_bins[position]] -= 1
+            bins[sample_bin] += 1
+            window_bins[position] = sample_bin
+            position += 1
+            if position == len(window_bins):
+                position = 0
+                window_filled = True
+        self.window_position = position
+        self.window_filled = window_filled
+
+    def draw(self, buffer, buffer_width: int, left: int, top: int, bottom: int):
+        # bars rising from bottom; the area is expected to have been cleared
+        bins = self.bins
+        rows = bottom - top + 1
+        largest = max(bins)
+        shift = 0
+        while largest >> shift >= rows:
+            shift += 1
+
+        column_bins = self.column_bins
+        for column in range(len(column_bins)):
+            height = bins[column_bins[column]] >> shift
+            if height:
+                fill_column_span(
+                    buffer, buffer_width, left + column, bottom - height + 1, bottom, 1
+                )
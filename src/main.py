@@ -1,17 +1,113 @@
-from machine import ADC, Pin, I2C  # type: ignore
+from machine import ADC, Pin, I2C, SPI  # type: ignore
 
 import asyncio
+import gc
+from array import array
 
+from clock import ms_since_boot, sleep_us
 from ssd1306_official import ssd1306
+from background import Background
+from acquisition import ThreadedAcquisition
+from frame_scheduler import FrameScheduler
+from vlsb import fill_column_span
+from persistence import PersistenceMap
+from deep_capture import DeepCapture, capacity_for_free_memory
+from trend import TrendStore, TREND_SECONDS, TREND_HOURS
+from memory_monitor import MemoryMonitor
+from xy_plot import XYPlot
+from histogram import Histogram
+from peak_hold import PeakHold
+from calibration import NOMINAL_VREF_MV, to_millivolts
+from command_channel import CommandChannel
+from controls import (
+    InputQueue,
+    Button,
+    RotaryEncoder,
+    EVENT_MODE,
+    EVENT_SELECT,
+    EVENT_UP,
+    EVENT_DOWN,
+)
+
+
+DISPLAY_BUS_I2C = "i2c"
+DISPLAY_BUS_SPI = "spi"
+
+TRACE_MODE_DOTS = "dots"
+TRACE_MODE_LINES = "lines"
+
+DISPLAY_MODE_SCOPE = "scope"
+DISPLAY_MODE_PERSISTENCE = "persistence"
+DISPLAY_MODE_DEEP_CAPTURE = "deep_capture"
+DISPLAY_MODE_TREND = "trend"
+DISPLAY_MODE_DEBUG = "debug"
+DISPLAY_MODE_XY = "xy"
+DISPLAY_MODE_HISTOGRAM = "histogram"
+DISPLAY_MODES = (
+    DISPLAY_MODE_SCOPE,
+    DISPLAY_MODE_PERSISTENCE,
+    DISPLAY_MODE_DEEP_CAPTURE,
+    DISPLAY_MODE_TREND,
+    DISPLAY_MODE_DEBUG,
+    DISPLAY_MODE_XY,
+    DISPLAY_MODE_HISTOGRAM,
+)
+# modes sampling on their own, with the frame acquisition paused
+OWN_ACQUISITION_DISPLAY_MODES = (DISPLAY_MODE_DEEP_CAPTURE, DISPLAY_MODE_XY)
+# modes drawing live frames, the only ones with a millivolt readout
+READOUT_DISPLAY_MODES = (DISPLAY_MODE_SCOPE, DISPLAY_MODE_PERSISTENCE)
+
+# parameters adjusted by the encoder (or the up/down buttons)
+CONTROL_TIMEBASE = 0
+CONTROL_SCALE = 1
+CONTROL_TRIGGER = 2
+CONTROLS = (CONTROL_TIMEBASE, CONTROL_SCALE, CONTROL_TRIGGER)
+
+TIMEBASE_DELAYS = (0, 0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01)
+# seconds between samples; a frame at the longest takes about 12 s
+MAX_ADC_DELAY = 0.1
+MAX_SCALE_SHIFT = 4
+TRIGGER_LEVEL_STEP = 2048
+# in deep capture, the timebase control zooms the record and the trigger
+# control pans it, by this many columns per step
+PAN_STEP_COLUMNS = 16
+
+STAGE_ACQUIRE = 0
+STAGE_PREPARE = 1
+STAGE_DRAW = 2
+STAGE_SHOW = 3
+PIPELINE_STAGE_NAMES = ("acq", "prep", "draw", "show")
+
+READOUT_LEFT = 40
+READOUT_TOP = 5
+READOUT_DIGITS = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9")
+
+
+def log_startup(milestone: str):
+    print("startup: {} after {} ms".format(milestone, ms_since_boot()))
 
 
 class HardwareInformation:
     adc_gpio_pin = 26
+    adc_b_gpio_pin = 27
+    display_bus = DISPLAY_BUS_I2C
     display_i2c_peripherial_id = 1  # 0
     display_sda_gpio_pin = 2  # 16
     display_scl_gpio_pin = 3  # 17
+    display_i2c_frequency = 400_000
+    display_spi_peripherial_id = 0
+    display_sck_gpio_pin = 18
+    display_mosi_gpio_pin = 19
+    display_cs_gpio_pin = 17
+    display_dc_gpio_pin = 20
+    display_res_gpio_pin = 21
+    display_spi_baudrate = 10_000_000
     display_width = 128
     display_height = 64
+    mode_button_gpio_pin = 14
+    select_button_gpio_pin = 15
+    encoder_a_gpio_pin = 12
+    encoder_b_gpio_pin = 13
 
 
 class PlotInformation:
@@ -29,39 +125,196 @@ class ADCMonitor:
         self,
         hardware_information: HardwareInformation = HardwareInformation(),
         adc_delay: float = 0.0001,
-        frame_delay: float = 0.05,
+        target_fps: int = 20,
+        dual_core: bool = False,
+        trace_mode: str = TRACE_MODE_DOTS,
+        display_mode: str = DISPLAY_MODE_SCOPE,
+        sample_logger=None,
+        stream_server=None,
+        trend_store=None,
+        memory_monitor=None,
+        profiler=None,
+        sample_source=None,
+        averager=None,
+        calibration=None,
+        controls: bool = False,
+        command_channel: bool = False,
+        event_detector=None,
+        defer_display_init: bool = True,
     ):
         self.hardware_information = hardware_information
 
         self.adc_delay = adc_delay
-        self.frame_delay = frame_delay
+        self.scale_shift = 0
+        self.acquisition = None
+        self.frame_scheduler = FrameScheduler(target_fps=target_fps)
+        self.dual_core = dual_core
+        self.trace_mode = trace_mode
+        self.display_mode = DISPLAY_MODE_SCOPE
+        self.persistence_map = None
+        self.deep_capture = None
+        self.xy_plot = None
+        self.histogram = None
+        self.peak_hold = None
+        self.adc_b = None
+        self.sample_value_reader_b = None
+        self.sample_logger = sample_logger
+        self.stream_server = stream_server
+        self.trend_store = trend_store
+        self.trend_level = TREND_SECONDS
+        self.drawn_trend_revision = -1
+        self.memory_monitor = memory_monitor
+        self.profiler = profiler
+        self.averager = averager
+        self.sample_source = sample_source
+        self.event_detector = event_detector
+        self.display_frozen = False
+        self.freeze_pending = False
 
-        self.adc = ADC(Pin(hardware_information.adc_gpio_pin))
         self.adc_value = 0
+        self.calibration = calibration
+        self.vref_mv = (
+            calibration.vref_mv if calibration is not None else NOMINAL_VREF_MV
+        )
+        self.set_adc_gpio_pin(hardware_information.adc_gpio_pin)
+        self.drawn_millivolts = -1
+        self.readout_digits = bytearray(5)
+
+        self.input_queue = None
+        self.selected_control = CONTROL_TIMEBASE
+        if controls:
+            self.input_setup(hardware_information=hardware_information)
+        self.command_channel = CommandChannel(self) if command_channel else None
 
         self.frame_raw_values = []
         self.frame_read_event = asyncio.Event()
+        # set by the draw loop once it has taken the published frame in
+        self.frame_drawn_event = asyncio.Event()
+
+        plot_information = PlotInformation(hardware_information)
+        # averaging looks for the trigger in frames longer than the plot
+        self.frame_samples = (
+            averager.frame_samples
+            if averager is not None
+            else plot_information.pixels_per_screen
+        )
+        self.source_frame_buffers = [
+            array("H", bytes(2 * self.frame_samples)),
+            array("H", bytes(2 * self.frame_samples)),
+        ]
+        self.source_frame_index = 0
+        # the frozen frame, as the buffers published are reused meanwhile
+        self.frozen_values = (
+            array("H", bytes(2 * plot_information.pixels_per_screen))
+            if event_detector is not None
+            else None
+        )
+        self.column_heights = bytearray(plot_information.pixels_per_screen)
+        self.drawn_column_heights = bytearray(plot_information.pixels_per_screen)
 
+        # the controller itself is brought up by display_start
         self.display = self.display_setup(hardware_information=hardware_information)
+        self.display_ready = asyncio.Event()
+        self.first_frame_shown = False
+        self.first_frame_acquired = False
+        self.background = Background(
+            hardware_information.display_width, hardware_information.display_height
+        )
+        self.background.set_region(
+            self.display.buffer,
+            left=plot_information.left_start,
+            top=plot_information.bottom_line - plot_information.pixels_top,
+            bottom=plot_information.bottom_line,
+            columns=plot_information.pixels_per_screen,
+        )
 
-        self.display_init(self.display)
-        self.draw_init()
+        self.draw_init(plot_information=plot_information)
+        self.invalidate_plot_area(
+            frame_buffer=self.display, plot_information=plot_information
+        )
+        self.set_display_mode(display_mode)
+        if not defer_display_init:
+            self.display.init_display(clear=False)
+            self.display_init(self.display)
+            self.display.show()
+            self.display_ready.set()
 
     def display_setup(
         self, hardware_information: HardwareInformation
+    ) -> ssd1306.SSD1306:
+        if hardware_information.display_bus == DISPLAY_BUS_SPI:
+            return self.display_setup_spi(hardware_information=hardware_information)
+
+        return self.display_setup_i2c(hardware_information=hardware_information)
+
+    def display_setup_i2c(
+        self, hardware_information: HardwareInformation
     ) -> ssd1306.SSD1306_I2C:
         i2c = I2C(
             hardware_information.display_i2c_peripherial_id,
             sda=Pin(hardware_information.display_sda_gpio_pin),
             scl=Pin(hardware_information.display_scl_gpio_pin),
-            freq=400_000,
+            freq=hardware_information.display_i2c_frequency,
         )
         display = ssd1306.SSD1306_I2C(
-            hardware_information.display_width, hardware_information.display_height, i2c
+            hardware_information.display_width,
+            hardware_information.display_height,
+            i2c,
+            defer_init=True,
+        )
+
+        return display
+
+    def display_setup_spi(
+        self, hardware_information: HardwareInformation
+    ) -> ssd1306.SSD1306_SPI:
+        spi = SPI(
+            hardware_information.display_spi_peripherial_id,
+            baudrate=hardware_information.display_spi_baudrate,
+            sck=Pin(hardware_information.display_sck_gpio_pin),
+            mosi=Pin(hardware_information.display_mosi_gpio_pin),
+        )
+        display = ssd1306.SSD1306_SPI(
+            hardware_information.display_width,
+            hardware_information.display_height,
+            spi,
+            dc=Pin(hardware_information.display_dc_gpio_pin),
+            res=Pin(hardware_information.display_res_gpio_pin),
+            cs=Pin(hardware_information.display_cs_gpio_pin),
+            rate=hardware_information.display_spi_baudrate,
+            defer_init=True,
         )
 
         return display
 
+    async def display_start(self):
+        # runs alongside the first acquisitions: the init sequence is one bus
+        # transfer, the first screen goes out page by page
+        self.display.init_display(clear=False)
+        self.display_init(self.display)
+        await self.show_display(frame_buffer=self.display)
+        self.display_ready.set()
+
+    def input_setup(self, hardware_information: HardwareInformation):
+        self.input_queue = InputQueue()
+        self.input_devices = [
+            Button(
+                hardware_information.mode_button_gpio_pin,
+                EVENT_MODE,
+                self.input_queue,
+            ),
+            Button(
+                hardware_information.select_button_gpio_pin,
+                EVENT_SELECT,
+                self.input_queue,
+            ),
+            RotaryEncoder(
+                hardware_information.encoder_a_gpio_pin,
+                hardware_information.encoder_b_gpio_pin,
+                self.input_queue,
+            ),
+        ]
+
     def display_init(self, display):
         display.contrast(255)
         display.invert(0)
@@ -72,54 +325,553 @@ class ADCMonitor:
     def get_adc_value(self):
         return self.adc_value
 
-    def draw_init(self):
-        self.display.text("Val:", 5, 5, 1)
-        self.display.rect(0, 0, 128, 64, 1)
-        self.display.show()
+    def draw_init(self, plot_information: PlotInformation):
+        background = self.background.frame_buffer
+        background.text("Val:", 5, 5, 1)
+        background.rect(0, 0, 128, 64, 1)
+        self.background.draw_graticule(
+            left=plot_information.left_start,
+            top=plot_information.bottom_line - plot_information.pixels_top,
+            bottom=plot_information.bottom_line,
+            columns=plot_information.pixels_per_screen,
+        )
+        self.background.restore_all(self.display.buffer)
 
     async def read_adc_values_for_frame(
         self, number_of_samples: int, sample_value_reader
     ):
         raw_adc_values = []
+        adc_delay = self.adc_delay
+        if adc_delay < 0.001:
+            # asyncio sleeps whole milliseconds, shorter delays would all be
+            # none: they are paced with sleep_us, yielding once per frame
+            adc_delay_us = int(adc_delay * 1_000_000)
+            for _ in range(number_of_samples):
+                raw_adc_values.append(sample_value_reader())
+                if adc_delay_us:
+                    sleep_us(adc_delay_us)
+            self.stage_suspend(STAGE_ACQUIRE)
+            await asyncio.sleep(0)
+            self.stage_resume(STAGE_ACQUIRE)
+            return raw_adc_values
+
         for _ in range(number_of_samples):
             raw_adc_values.append(sample_value_reader())
+            # the other tasks run meanwhile, outside of the acquire stage
+            self.stage_suspend(STAGE_ACQUIRE)
             await asyncio.sleep(self.adc_delay)
+            self.stage_resume(STAGE_ACQUIRE)
 
         return raw_adc_values
 
+    def read_source_frame(self):
+        # alternates between two buffers, as the one published last may
+        # still be waiting to be drawn
+        frame_samples = self.source_frame_buffers[self.source_frame_index]
+        self.source_frame_index ^= 1
+        self.sample_source.read_into(frame_samples)
+        return frame_samples
+
     def clear_plot_area(self, frame_buffer, plot_information: PlotInformation):
+        # the region copied is the plot area of the display buffer, set up
+        # along with the background
+        self.background.restore_region()
+
+    def stage_begin(self, stage: int):
+        if self.memory_monitor is not None:
+            self.memory_monitor.begin(stage)
+        if self.profiler is not None:
+            self.profiler.begin(stage)
+
+    def stage_end(self, stage: int):
+        if self.profiler is not None:
+            self.profiler.end(stage)
+        if self.memory_monitor is not None:
+            self.memory_monitor.end(stage)
+
+    def stage_suspend(self, stage: int):
+        if self.memory_monitor is not None:
+            self.memory_monitor.suspend(stage)
+        if self.profiler is not None:
+            self.profiler.suspend(stage)
+
+    def stage_resume(self, stage: int):
+        if self.profiler is not None:
+            self.profiler.resume(stage)
+        if self.memory_monitor is not None:
+            self.memory_monitor.resume(stage)
+
+    def frame_end(self):
+        if self.memory_monitor is not None:
+            self.memory_monitor.end_frame()
+
+    def invalidate_plot_area(self, frame_buffer, plot_information: PlotInformation):
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        self.invalidate_column_heights()
+
+    def invalidate_column_heights(self):
+        # out of screen heights never match, so every column gets redrawn
+        for position in range(len(self.drawn_column_heights)):
+            self.drawn_column_heights[position] = 0xFF
+
+    def set_trace_mode(self, trace_mode: str):
+        if trace_mode not in (TRACE_MODE_DOTS, TRACE_MODE_LINES):
+            raise ValueError("unknown trace mode {}".format(trace_mode))
+        self.trace_mode = trace_mode
+        self.invalidate_column_heights()
+
+    def set_display_mode(self, display_mode: str):
+        if display_mode not in DISPLAY_MODES:
+            raise ValueError("unknown display mode {}".format(display_mode))
+        plot_information = PlotInformation(self.hardware_information)
+        if display_mode == DISPLAY_MODE_PERSISTENCE:
+            if self.persistence_map is None:
+                self.persistence_map = PersistenceMap(
+                    width=plot_information.pixels_per_screen,
+                    height=plot_information.pixels_top + 1,
+                )
+            else:
+                self.persistence_map.clear()
+        elif display_mode == DISPLAY_MODE_DEEP_CAPTURE:
+            if self.deep_capture is None:
+                gc.collect()
+                self.deep_capture = DeepCapture(
+                    capacity=capacity_for_free_memory(gc.mem_free()),
+                    columns=plot_information.pixels_per_screen,
+                )
+            self.deep_capture.captured = False
+        elif display_mode == DISPLAY_MODE_TREND:
+            if self.trend_store is None:
+                self.trend_store = TrendStore()
+            self.drawn_trend_revision = -1
+        elif display_mode == DISPLAY_MODE_DEBUG:
+            if self.memory_monitor is None:
+                self.memory_monitor = MemoryMonitor(PIPELINE_STAGE_NAMES)
+        elif display_mode == DISPLAY_MODE_HISTOGRAM:
+            if self.histogram is None:
+                self.histogram = Histogram(columns=plot_information.pixels_per_screen)
+            else:
+                self.histogram.clear()
+        elif display_mode == DISPLAY_MODE_XY:
+            if self.xy_plot is None:
+                self.xy_plot = XYPlot(
+                    left=plot_information.left_start,
+                    top=plot_information.bottom_line - plot_information.pixels_top,
+                    bottom=plot_information.bottom_line,
+                    columns=plot_information.pixels_per_screen,
+                    buffer_width=self.hardware_information.display_width,
+                )
+                self.adc_b = ADC(Pin(self.hardware_information.adc_b_gpio_pin))
+                self.sample_value_reader_b = self.adc_b.read_u16
+                if self.calibration is not None:
+                    self.sample_value_reader_b = self.calibration.reader(
+                        self.adc_b.read_u16
+                    )
+
+        if display_mode not in READOUT_DISPLAY_MODES:
+            self.clear_readout(self.display)
+        self.display_mode = display_mode
+        self.invalidate_column_heights()
+
+    def set_adc_gpio_pin(self, adc_gpio_pin: int):
+        self.adc_gpio_pin = adc_gpio_pin
+        self.adc = ADC(Pin(adc_gpio_pin))
+        if self.calibration is not None:
+            self.sample_value_reader = self.calibration.reader(self.adc.read_u16)
+        else:
+            self.sample_value_reader = self.adc.read_u16
+        if self.acquisition is not None:
+            self.acquisition.sample_value_reader = self.sample_value_reader
+        if hasattr(self.sample_source, "adc"):
+            self.sample_source.adc = self.adc
+
+    def set_adc_delay(self, adc_delay: float):
+        # also rejects nan and inf
+        if not 0 <= adc_delay <= MAX_ADC_DELAY:
+            raise ValueError("adc_delay out of range 0..{}".format(MAX_ADC_DELAY))
+        self.adc_delay = adc_delay
+        if self.acquisition is not None:
+            self.acquisition.sample_delay = adc_delay
+        if hasattr(self.sample_source, "sample_delay_us"):
+            self.sample_source.sample_delay_us = int(adc_delay * 1_000_000)
+
+    def set_scale_shift(self, scale_shift: int):
+        self.scale_shift = max(0, min(scale_shift, MAX_SCALE_SHIFT))
+        self.invalidate_column_heights()
+
+    def set_trigger_level(self, trigger_level: int):
+        if self.averager is not None:
+            self.averager.trigger.level = max(0, min(trigger_level, 0xFFFF))
+            self.averager.reset()
+
+    def adjust_control(self, control: int, steps: int):
+        if self.display_mode == DISPLAY_MODE_DEEP_CAPTURE and control != CONTROL_SCALE:
+            if control == CONTROL_TIMEBASE:
+                self.zoom_deep_capture(steps)
+            else:
+                self.pan_deep_capture(steps * PAN_STEP_COLUMNS)
+        elif control == CONTROL_TIMEBASE:
+            index = 0
+            while (
+                index < len(TIMEBASE_DELAYS) - 1
+                and TIMEBASE_DELAYS[index] < self.adc_delay
+            ):
+                index += 1
+            index = max(0, min(index + steps, len(TIMEBASE_DELAYS) - 1))
+            self.set_adc_delay(TIMEBASE_DELAYS[index])
+        elif control == CONTROL_SCALE:
+            self.set_scale_shift(self.scale_shift + steps)
+        elif control == CONTROL_TRIGGER and self.averager is not None:
+            self.set_trigger_level(
+                self.averager.trigger.level + steps * TRIGGER_LEVEL_STEP
+            )
+
+    def handle_input_event(self, event: int):
+        if event == EVENT_MODE:
+            mode_index = DISPLAY_MODES.index(self.display_mode)
+            self.set_display_mode(DISPLAY_MODES[(mode_index + 1) % len(DISPLAY_MODES)])
+        elif event == EVENT_SELECT:
+            self.selected_control = (self.selected_control + 1) % len(CONTROLS)
+        elif event == EVENT_UP:
+            self.adjust_control(self.selected_control, 1)
+        elif event == EVENT_DOWN:
+            self.adjust_control(self.selected_control, -1)
+        # redraws the last frame, acquisition may be idle (deep capture)
+        if self.frame_raw_values:
+            self.frame_read_event.set()
+
+    async def input_loop(self):
+        input_queue = self.input_queue
+        while True:
+            await input_queue.wait()
+            event = input_queue.get()
+            while event:
+                self.handle_input_event(event)
+                event = input_queue.get()
+
+    def rearm_event_detector(self):
+        self.display_frozen = False
+
+    def set_peak_hold(self, enabled: bool, decay_interval: int = 0):
+        if enabled:
+            plot_information = PlotInformation(self.hardware_information)
+            self.peak_hold = PeakHold(
+                columns=plot_information.pixels_per_screen,
+                decay_interval=decay_interval,
+            )
+        else:
+            self.peak_hold = None
+        self.invalidate_column_heights()
+
+    def reset_peak_hold(self):
+        self.peak_hold.reset()
+
+    def set_trend_level(self, trend_level: int):
+        if not TREND_SECONDS <= trend_level <= TREND_HOURS:
+            raise ValueError("unknown trend level {}".format(trend_level))
+        self.trend_level = trend_level
+        self.drawn_trend_revision = -1
+
+    def rearm_deep_capture(self):
+        self.deep_capture.captured = False
+
+    def zoom_deep_capture(self, steps: int):
+        self.deep_capture.zoom(steps)
+        self.frame_read_event.set()
+
+    def pan_deep_capture(self, columns: int):
+        self.deep_capture.pan(columns)
+        self.frame_read_event.set()
+
+    def scaled_value(self, value: int) -> int:
+        # vertical gain of 2**scale_shift around mid scale
+        value = ((value - 0x8000) << self.scale_shift) + 0x8000
+        return 0 if value < 0 else 0xFFFF if value > 0xFFFF else value
+
+    def sample_height(self, plot_information: PlotInformation, value: int) -> int:
+        if self.scale_shift:
+            value = self.scaled_value(value)
+        return plot_information.bottom_line - (
+            (value * plot_information.pixels_top) >> 16
+        )
+
+    def prepare_column_heights(
+        self, plot_information: PlotInformation, raw_values, column_heights
+    ):
+        pixels_top = plot_information.pixels_top
+        bottom_line = plot_information.bottom_line
+        if self.scale_shift:
+            scaled_value = self.scaled_value
+            for position in range(len(raw_values)):
+                column_heights[position] = bottom_line - (
+                    (scaled_value(raw_values[position]) * pixels_top) >> 16
+                )
+            return
+
+        for position in range(len(raw_values)):
+            column_heights[position] = bottom_line - (
+                (raw_values[position] * pixels_top) >> 16
+            )
+
+    def clear_readout(self, frame_buffer):
+        frame_buffer.fill_rect(READOUT_LEFT, READOUT_TOP, 80, 8, 0)
+        self.drawn_millivolts = -1
+
+    def draw_readout(self, frame_buffer, raw_values) -> bool:
+        # mean of the frame in millivolts, next to the label; nothing before
+        # the first frame (a mode drawing its own, such as XY, came first)
+        if self.display_mode not in READOUT_DISPLAY_MODES or not raw_values:
+            return False
+
+        total = 0
+        for value in raw_values:
+            total += value
+        millivolts = to_millivolts(total // len(raw_values), self.vref_mv)
+        if millivolts == self.drawn_millivolts:
+            return False
+
+        self.clear_readout(frame_buffer)
+        self.drawn_millivolts = millivolts
+        self.set_adc_value(millivolts)
+        # digit by digit from constant strings, as formatting would allocate
+        digits = self.readout_digits
+        count = 0
+        while True:
+            digits[count] = millivolts % 10
+            count += 1
+            millivolts //= 10
+            if not millivolts:
+                break
+        left = READOUT_LEFT
+        for index in range(count - 1, -1, -1):
+            frame_buffer.text(READOUT_DIGITS[digits[index]], left, READOUT_TOP, 1)
+            left += 8
+        frame_buffer.text("mV", left, READOUT_TOP, 1)
+        return True
+
+    def draw_changed_columns(
+        self, frame_buffer, plot_information: PlotInformation, column_heights
+    ) -> bool:
+        # Each changed column has its plot pages restored from the background
+        # and its trace span set, as byte masks written straight into the
+        # MONO_VLSB pages: a single row for dots, the run joining the previous
+        # sample for lines. With peak hold, columns whose envelope moved are
+        # redrawn too, with the envelope rows on top.
+        buffer = frame_buffer.buffer
+        width = frame_buffer.width
+        plot_top = plot_information.bottom_line - plot_information.pixels_top
+        plot_bottom = plot_information.bottom_line
+        left_start = plot_information.left_start
+        drawn_column_heights = self.drawn_column_heights
+        background = self.background
+        line_trace = self.trace_mode == TRACE_MODE_LINES
+        peak_hold = self.peak_hold
+        hold = peak_hold is not None
+        if hold:
+            peak_hold.update(column_heights)
+            hold_changed = peak_hold.changed
+            hold_tops = peak_hold.tops
+            hold_bottoms = peak_hold.bottoms
+
+        changed = False
+        previous_height = column_heights[0]
+        previous_changed = False
+        for position in range(len(column_heights)):
+            height = column_heights[position]
+            height_changed = height != drawn_column_heights[position]
+            if (
+                height_changed
+                or (line_trace and previous_changed)
+                or (hold and hold_changed[position])
+            ):
+                x = left_start + position
+                background.restore_column(buffer, x, plot_top, plot_bottom)
+                if line_trace and previous_height < height:
+                    fill_column_span(buffer, width, x, previous_height, height, 1)
+                elif line_trace:
+                    fill_column_span(buffer, width, x, height, previous_height, 1)
+                else:
+                    fill_column_span(buffer, width, x, height, height, 1)
+                if hold:
+                    top = hold_tops[position]
+                    bottom = hold_bottoms[position]
+                    fill_column_span(buffer, width, x, top, top, 1)
+                    fill_column_span(buffer, width, x, bottom, bottom, 1)
+                drawn_column_heights[position] = height
+                changed = True
+            previous_height = height
+            previous_changed = height_changed
+
+        return changed
+
+    def draw_persistence(
+        self, frame_buffer, plot_information: PlotInformation, column_heights
+    ) -> bool:
+        plot_top = plot_information.bottom_line - plot_information.pixels_top
+        self.persistence_map.accumulate(column_heights, top=plot_top)
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        self.persistence_map.render(
+            frame_buffer.buffer,
+            frame_buffer.width,
+            left=plot_information.left_start,
+            top=plot_top,
+        )
+        return True
+
+    def draw_deep_capture(
+        self, frame_buffer, plot_information: PlotInformation
+    ) -> bool:
+        deep_capture = self.deep_capture
+        if not deep_capture.captured:
+            return False
+
+        deep_capture.compute_view()
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        buffer = frame_buffer.buffer
+        width = frame_buffer.width
+        for position in range(deep_capture.columns):
+            x = plot_information.left_start + position
+            fill_column_span(
+                buffer,
+                width,
+                x,
+                self.sample_height(plot_information, deep_capture.view_max[position]),
+                self.sample_height(plot_information, deep_capture.view_min[position]),
+                1,
+            )
+
+        self.invalidate_column_heights()
+        return True
+
+    def draw_trend(self, frame_buffer, plot_information: PlotInformation) -> bool:
+        # redrawn only when a bucket has been completed since the last time
+        if self.trend_store.revision == self.drawn_trend_revision:
+            return False
+        self.drawn_trend_revision = self.trend_store.revision
+
+        trend_level = self.trend_store.levels[self.trend_level]
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        buffer = frame_buffer.buffer
+        width = frame_buffer.width
+        columns = plot_information.pixels_per_screen
+        for position in range(columns):
+            x = plot_information.left_start + position
+            age = columns - 1 - position
+            if age < trend_level.stored:
+                index = trend_level.index_for_age(age)
+                fill_column_span(
+                    buffer,
+                    width,
+                    x,
+                    self.sample_height(plot_information, trend_level.maximums[index]),
+                    self.sample_height(plot_information, trend_level.minimums[index]),
+                    1,
+                )
+
+        self.invalidate_column_heights()
+        return True
+
+    def draw_xy(self, frame_buffer, plot_information: PlotInformation) -> bool:
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        self.xy_plot.draw(frame_buffer.buffer)
+        self.invalidate_column_heights()
+        return True
+
+    def draw_histogram(self, frame_buffer, plot_information: PlotInformation) -> bool:
+        self.clear_plot_area(
+            frame_buffer=frame_buffer, plot_information=plot_information
+        )
+        self.histogram.draw(
+            frame_buffer.buffer,
+            frame_buffer.width,
+            left=plot_information.left_start,
+            top=plot_information.bottom_line - plot_information.pixels_top,
+            bottom=plot_information.bottom_line,
+        )
+        self.invalidate_column_heights()
+        return True
+
+    def draw_debug_page(self, frame_buffer, plot_information: PlotInformation) -> bool:
+        # blank rather than restored, the graticule would make text unreadable
         frame_buffer.fill_rect(
             plot_information.left_start,
-            plot_information.bottom_line - (plot_information.pixels_top + 1),
+            plot_information.bottom_line - plot_information.pixels_top,
             plot_information.pixels_per_screen,
             plot_information.pixels_top + 1,
             0,
         )
+        # the report formats its lines: not an allocation of the draw stage
+        self.memory_monitor.suspend(STAGE_DRAW)
+        self.memory_monitor.draw_debug_page(
+            frame_buffer,
+            left=plot_information.left_start,
+            top=plot_information.bottom_line - plot_information.pixels_top,
+            width=plot_information.pixels_per_screen,
+        )
+        self.memory_monitor.resume(STAGE_DRAW)
+        self.invalidate_column_heights()
+        return True
 
-    def prepare_frame_buffer_pixels(
-        self, plot_information: PlotInformation, raw_values
-    ):
-        def to_pixels(value):
-            return int(value * plot_information.pixels_top / 65536)
+    def draw_plot(
+        self, frame_buffer, plot_information: PlotInformation, column_heights
+    ) -> bool:
+        if self.display_mode == DISPLAY_MODE_XY:
+            return self.draw_xy(
+                frame_buffer=frame_buffer, plot_information=plot_information
+            )
 
-        frame_buffer_pixels = []
+        if self.display_mode == DISPLAY_MODE_HISTOGRAM:
+            return self.draw_histogram(
+                frame_buffer=frame_buffer, plot_information=plot_information
+            )
 
-        for position, value in enumerate(raw_values):
-            value_in_pixels = to_pixels(value)
-            left = plot_information.left_start + position
-            frame_buffer_pixels.append(
-                (left, plot_information.bottom_line - value_in_pixels, 1)
+        if self.display_mode == DISPLAY_MODE_DEBUG:
+            return self.draw_debug_page(
+                frame_buffer=frame_buffer, plot_information=plot_information
             )
 
-        return frame_buffer_pixels
+        if self.display_mode == DISPLAY_MODE_TREND:
+            return self.draw_trend(
+                frame_buffer=frame_buffer, plot_information=plot_information
+            )
 
-    def draw_points_on_screen(
-        self, frame_buffer: ssd1306.SSD1306_I2C, frame_buffer_points
-    ):
-        for x, y, color in frame_buffer_points:
-            frame_buffer.pixel(x, y, color)
+        if self.display_mode == DISPLAY_MODE_DEEP_CAPTURE:
+            return self.draw_deep_capture(
+                frame_buffer=frame_buffer, plot_information=plot_information
+            )
 
-        frame_buffer.show()
+        if self.display_mode == DISPLAY_MODE_PERSISTENCE:
+            return self.draw_persistence(
+                frame_buffer=frame_buffer,
+                plot_information=plot_information,
+                column_heights=column_heights,
+            )
+
+        return self.draw_changed_columns(
+            frame_buffer=frame_buffer,
+            plot_information=plot_information,
+            column_heights=column_heights,
+        )
+
+    async def show_display(self, frame_buffer: ssd1306.SSD1306):
+        # one page per write, yielding in between, so that sampling goes on
+        # while the frame is being transferred
+        frame_buffer.show_begin()
+        for page_buffer in frame_buffer.page_buffers:
+            frame_buffer.write_data(page_buffer)
+            self.stage_suspend(STAGE_SHOW)
+            await asyncio.sleep(0)
+            self.stage_resume(STAGE_SHOW)
 
     async def read_and_draw_screen(
         self, frame_buffer, plot_information: PlotInformation, sample_value_reader
@@ -138,54 +890,239 @@ class ADCMonitor:
 
     async def draw_screen(
         self, frame_buffer, plot_information: PlotInformation, raw_values
-    ):
-        frame_buffer_points = self.prepare_frame_buffer_pixels(
-            plot_information=plot_information, raw_values=raw_values
+    ) -> bool:
+        self.prepare_column_heights(
+            plot_information=plot_information,
+            raw_values=raw_values,
+            column_heights=self.column_heights,
         )
 
-        self.clear_plot_area(
+        changed = self.draw_plot(
             frame_buffer=frame_buffer,
             plot_information=plot_information,
+            column_heights=self.column_heights,
         )
+        if self.draw_readout(frame_buffer=frame_buffer, raw_values=raw_values):
+            changed = True
 
-        self.draw_points_on_screen(
-            frame_buffer=frame_buffer, frame_buffer_points=frame_buffer_points
-        )
+        if changed:
+            if not self.display_ready.is_set():
+                await self.display_start()
+            await self.show_display(frame_buffer=frame_buffer)
+
+        return changed
 
     async def single_screen_loop(self, frame_buffer, plot_information: PlotInformation):
         await self.read_and_draw_screen(
             frame_buffer=frame_buffer,
             plot_information=plot_information,
-            sample_value_reader=self.adc.read_u16,
+            sample_value_reader=self.sample_value_reader,
         )
 
     async def main_data_loop(self):
 
         plot_information = PlotInformation(self.hardware_information)
 
+        if not self.display_ready.is_set():
+            asyncio.create_task(self.display_start())
         asyncio.create_task(self.draw_screen_loop())
+        if self.sample_logger is not None:
+            asyncio.create_task(self.sample_logger.run())
+        if self.stream_server is not None:
+            asyncio.create_task(self.stream_server.run())
+        if self.input_queue is not None:
+            asyncio.create_task(self.input_loop())
+        if self.command_channel is not None:
+            asyncio.create_task(self.command_channel.run())
+
+        if self.dual_core:
+            await self.threaded_data_loop(plot_information=plot_information)
+            return
 
         while True:
-            self.frame_raw_values = await self.read_adc_values_for_frame(
-                number_of_samples=plot_information.pixels_per_screen,
-                sample_value_reader=self.adc.read_u16,
-            )
-            self.frame_read_event.set()
+            if self.display_mode in OWN_ACQUISITION_DISPLAY_MODES:
+                await self.own_acquisition_step()
+                continue
+
+            self.stage_begin(STAGE_ACQUIRE)
+            if self.sample_source is not None:
+                raw_values = self.read_source_frame()
+                self.stage_end(STAGE_ACQUIRE)
+                await asyncio.sleep(0)
+            else:
+                raw_values = await self.read_adc_values_for_frame(
+                    number_of_samples=self.frame_samples,
+                    sample_value_reader=self.sample_value_reader,
+                )
+                self.stage_end(STAGE_ACQUIRE)
+            has_event = False
+            if self.event_detector is not None:
+                has_event = self.event_detector.process_frame(raw_values)
+            self.publish_frame(raw_values, has_event)
+
+    async def own_acquisition_step(self):
+        if self.display_mode == DISPLAY_MODE_XY:
+            await self.xy_step()
+        else:
+            await self.deep_capture_step()
+
+    async def xy_step(self):
+        # pairs are read again once the previous ones have been drawn
+        if self.frame_read_event.is_set():
+            self.frame_drawn_event.clear()
+            await self.frame_drawn_event.wait()
+            return
+
+        self.xy_plot.read_pairs(self.sample_value_reader, self.sample_value_reader_b)
+        self.frame_read_event.set()
+
+    async def deep_capture_step(self):
+        if self.deep_capture.captured:
+            # the record is only redrawn when the view changes
+            await asyncio.sleep(self.frame_scheduler.frame_period_ms / 1000)
+            return
+
+        if self.sample_source is not None:
+            await self.deep_capture.capture_from_source(self.sample_source)
+        else:
+            await self.deep_capture.capture(self.sample_value_reader)
+        self.frame_read_event.set()
+
+    def publish_frame(self, raw_values, has_event: bool = False):
+        if not self.first_frame_acquired:
+            # once read, or taken from core 1
+            self.first_frame_acquired = True
+            log_startup("first sample")
+
+        # binned before averaging, noise is what the histogram is for
+        if self.display_mode == DISPLAY_MODE_HISTOGRAM:
+            self.histogram.add_frame(raw_values)
+
+        # with averaging, the display freezes on the first average taken
+        # after the frame with the event
+        if has_event and not self.display_frozen:
+            self.freeze_pending = self.event_detector.freeze
+
+        # with averaging, several acquired frames make a published one
+        if self.averager is not None:
+            if not self.averager.add_frame(raw_values):
+                return
+            raw_values = self.averager.average
+
+        self.frame_acquired(raw_values)
+        # a frozen display keeps showing the frame with the event, logging
+        # and streaming go on
+        if self.display_frozen:
+            return
+
+        if self.freeze_pending:
+            frozen_values = self.frozen_values
+            for index in range(len(raw_values)):
+                frozen_values[index] = raw_values[index]
+            raw_values = frozen_values
+            self.freeze_pending = False
+            self.display_frozen = True
+        self.frame_raw_values = raw_values
+        self.frame_read_event.set()
+
+    def frame_acquired(self, raw_values):
+        if self.trend_store is not None:
+            self.trend_store.add_frame(raw_values)
+        if self.sample_logger is not None:
+            self.sample_logger.log_frame(raw_values)
+        if self.stream_server is not None:
+            self.stream_server.publish(raw_values)
+
+    async def threaded_data_loop(self, plot_information: PlotInformation):
+        acquisition = ThreadedAcquisition(
+            number_of_samples=self.frame_samples,
+            sample_value_reader=self.sample_value_reader,
+            sample_delay=self.adc_delay,
+            sample_source=self.sample_source,
+            frame_observer=(
+                self.event_detector.process_frame
+                if self.event_detector is not None
+                else None
+            ),
+        )
+        self.acquisition = acquisition
+        frame_flag = acquisition.frame_flag
+        acquisition.start()
+        try:
+            while True:
+                if self.display_mode in OWN_ACQUISITION_DISPLAY_MODES:
+                    acquisition.pause()
+                    if acquisition.idle:
+                        await self.own_acquisition_step()
+                    else:
+                        await frame_flag.wait()
+                        frame_flag.clear()
+                    continue
+                acquisition.resume()
+
+                # a new frame is taken only once the previous one has been
+                # drawn, as taking it recycles the buffer being drawn; the
+                # flag is set for a new frame and by the draw loop
+                if not self.frame_read_event.is_set() and acquisition.take_frame():
+                    self.publish_frame(acquisition.read_buffer, acquisition.read_marked)
+                await frame_flag.wait()
+                frame_flag.clear()
+        finally:
+            acquisition.stop()
+            self.acquisition = None
 
     async def draw_screen_loop(self):
         plot_information = PlotInformation(self.hardware_information)
         frame_buffer = self.display
+        frame_scheduler = self.frame_scheduler
+        await self.display_ready.wait()
         while True:
             await self.frame_read_event.wait()
-            await self.draw_screen(
-                frame_buffer=frame_buffer,
+            frame_start = frame_scheduler.frame_started()
+            self.stage_begin(STAGE_PREPARE)
+            self.prepare_column_heights(
                 plot_information=plot_information,
                 raw_values=self.frame_raw_values,
+                column_heights=self.column_heights,
             )
+            self.stage_end(STAGE_PREPARE)
             self.frame_read_event.clear()
-            await asyncio.sleep(self.frame_delay)
+            self.frame_drawn_event.set()
+            if self.acquisition is not None:
+                # the threaded data loop may take the next frame
+                self.acquisition.frame_flag.set()
 
+            self.stage_begin(STAGE_DRAW)
+            changed = self.draw_plot(
+                frame_buffer=frame_buffer,
+                plot_information=plot_information,
+                column_heights=self.column_heights,
+            )
+            if self.draw_readout(
+                frame_buffer=frame_buffer, raw_values=self.frame_raw_values
+            ):
+                changed = True
+            self.stage_end(STAGE_DRAW)
+            if changed:
+                self.stage_begin(STAGE_SHOW)
+                await self.show_display(frame_buffer=frame_buffer)
+                self.stage_end(STAGE_SHOW)
+                self.frame_end()
+                if not self.first_frame_shown:
+                    self.first_frame_shown = True
+                    log_startup("first frame")
+            frame_scheduler.frame_finished(frame_start, changed=changed)
 
-if __name__ == "__main__":
-    adcm = ADCMonitor()
+            await asyncio.sleep(frame_scheduler.next_delay_ms() / 1000)
+
+
+def run():
+    log_startup("modules loaded")
+    # live reconfiguration over the USB serial console, buttons and encoder
+    adcm = ADCMonitor(command_channel=True, controls=True)
+    log_startup("initialized")
     asyncio.run(adcm.main_data_loop())  #  type: ignore
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,108 @@
+import gc
+from array import array
+
+try:
+    mem_alloc = gc.mem_alloc  # type: ignore
+    mem_free = gc.mem_free  # type: ignore
+except AttributeError:
+    # CPython has no heap figures: everything reads as allocation free
+
+    def mem_alloc():
+        return 0
+
+    def mem_free():
+        return 0
+
+
+class MemoryMonitor:
+    # Heap allocated by each pipeline stage, from gc.mem_alloc() readings
+    # taken when the stage begins and ends. A reading lower than the one at
+    # the beginning means the collector ran during the stage; such stages are
+    # counted as collections and their delta is unknown (left at zero).
+    # Between suspend and resume, while the stage awaits or draws this very
+    # report, allocations are not charged to it.
+    def __init__(
+        self, stage_names, idle_collect: bool = False, report_interval: int = 0
+    ) -> None:
+        self.stage_names = stage_names
+        self.idle_collect = idle_collect
+        self.report_interval = report_interval
+
+        self.stage_starts = array("l", [0] * len(stage_names))
+        self.suspend_starts = array("l", [0] * len(stage_names))
+        self.stages_collected = bytearray(len(stage_names))
+        self.last_deltas = array("l", [0] * len(stage_names))
+        self.max_deltas = array("l", [0] * len(stage_names))
+
+        self.frames = 0
+        self.allocating_frames = 0
+        self.frame_allocated = False
+        self.collections = 0
+        self.idle_collections = 0
+
+    def begin(self, stage: int):
+        self.stages_collected[stage] = 0
+        self.stage_starts[stage] = mem_alloc()
+
+    def suspend(self, stage: int):
+        self.suspend_starts[stage] = mem_alloc()
+
+    def resume(self, stage: int):
+        allocated = mem_alloc() - self.suspend_starts[stage]
+        if allocated < 0:
+            self.stages_collected[stage] = 1
+        else:
+            self.stage_starts[stage] += allocated
+
+    def end(self, stage: int):
+        delta = mem_alloc() - self.stage_starts[stage]
+        if delta < 0 or self.stages_collected[stage]:
+            self.collections += 1
+            delta = 0
+        self.last_deltas[stage] = delta
+        if delta > self.max_deltas[stage]:
+            self.max_deltas[stage] = delta
+        if delta:
+            self.frame_allocated = True
+
+    def end_frame(self):
+        self.frames += 1
+        if self.frame_allocated:
+            self.allocating_frames += 1
+        self.frame_allocated = False
+
+        if self.idle_collect:
+            # the frame has just been sent: a good time for a collection
+            gc.collect()
+            self.idle_collections += 1
+
+        if self.report_interval and self.frames % self.report_interval == 0:
+            self.print_report()
+
+    def report_lines(self):
+        # short enough for the plot area: stage last/max, then collections
+        # (detected/idle) and free heap
+        lines = [
+            "{} {}/{}".format(
+                stage_name, self.last_deltas[stage], self.max_deltas[stage]
+            )
+            for stage, stage_name in enumerate(self.stage_names)
+        ]
+        lines.append(
+            "gc {}/{} {}".format(self.collections, self.idle_collections, mem_free())
+        )
+        return lines
+
+    def print_report(self):
+        print(
+            "memory: frames {} allocating {}".format(
+                self.frames, self.allocating_frames
+            )
+        )
+        for line in self.report_lines():
+            print("  " + line)
+
+    def draw_debug_page(self, frame_buffer, left: int, top: int, width: int):
+        max_characters = width // 8
+        for line_number, line in enumerate(self.report_lines()):
+            frame_buffer.text(line[:max_characters], left, top + 8 * line_number, 1)
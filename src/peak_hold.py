@@ -0,0 +1,43 @@
+class PeakHold:
+    # Envelope of the trace in pixel rows: per column, the highest point
+    # (smallest row) and the lowest one (largest row) seen since the last
+    # reset. Every decay_interval frames (never when 0) both edges move
+    # decay_step rows back towards the live trace. changed flags the columns
+    # whose envelope moved in the last update.
+    def __init__(self, columns: int, decay_interval: int = 0, decay_step: int = 1):
+        self.decay_interval = decay_interval
+        self.decay_step = decay_step
+        self.tops = bytearray(columns)
+        self.bottoms = bytearray(columns)
+        self.changed = bytearray(columns)
+        self.frames_to_decay = decay_interval
+        self.reset()
+
+    def reset(self):
+        # the next update starts the envelope over from the live trace
+        for column in range(len(self.tops)):
+            self.tops[column] = 0xFF
+            self.bottoms[column] = 0
+
+    def update(self, column_heights):
+        decay = 0
+        if self.decay_interval:
+            self.frames_to_decay -= 1
+            if self.frames_to_decay <= 0:
+                self.frames_to_decay = self.decay_interval
+                decay = self.decay_step
+
+        tops = self.tops
+        bottoms = self.bottoms
+        changed = self.changed
+        for column in range(len(column_heights)):
+            height = column_heights[column]
+            top = tops[column] + decay
+            bottom = bottoms[column] - decay
+            if height < top:
+                top = height
+            if height > bottom:
+                bottom = height
+            changed[column] = top != tops[column] or bottom != bottoms[column]
+            tops[column] = top
+            bottoms[column] = bottom
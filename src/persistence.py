@@ -0,0 +1,74 @@
+# 4x4 ordered dithering matrix, scaled to intensity thresholds
+BAYER_THRESHOLDS = bytes(
+    level * 16 + 8 for level in (0, 8, 2, 10, 12, 4, 14, 6, 3, 11, 1, 9, 15, 7, 13, 5)
+)
+
+
+class PersistenceMap:
+    # Phosphor-like accumulation of the trace: one intensity counter per plot
+    # pixel, bumped by every sample that lands on it and halved (or more) every
+    # decay_interval frames. All updates are integer and in place.
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        increment: int = 128,
+        decay_interval: int = 4,
+        decay_shift: int = 1,
+        dither: bool = True,
+        threshold: int = 64,
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.increment = increment
+        self.decay_interval = decay_interval
+        self.decay_shift = decay_shift
+        self.thresholds = BAYER_THRESHOLDS if dither else bytes([threshold] * 16)
+
+        self.intensities = bytearray(width * height)
+        self.frames_to_decay = decay_interval
+
+    def clear(self):
+        intensities = self.intensities
+        for index in range(len(intensities)):
+            intensities[index] = 0
+
+    def accumulate(self, column_heights, top: int):
+        intensities = self.intensities
+        width = self.width
+        increment = self.increment
+        for position in range(len(column_heights)):
+            index = (column_heights[position] - top) * width + position
+            intensity = intensities[index] + increment
+            intensities[index] = intensity if intensity < 255 else 255
+
+        self.frames_to_decay -= 1
+        if self.frames_to_decay <= 0:
+            self.frames_to_decay = self.decay_interval
+            self.decay()
+
+    def decay(self):
+        intensities = self.intensities
+        decay_shift = self.decay_shift
+        for index in range(len(intensities)):
+            intensities[index] >>= decay_shift
+
+    def render(self, buffer, buffer_width: int, left: int, top: int):
+        # lights, in the MONO_VLSB buffer, the pixels whose intensity exceeds
+        # the threshold for their dithering cell; the area is expected to have
+        # been cleared (or restored to its background) beforehand
+        intensities = self.intensities
+        thresholds = self.thresholds
+        width = self.width
+        for row in range(self.height):
+            y = top + row
+            page_start = (y >> 3) * buffer_width + left
+            bit = 1 << (y & 7)
+            row_start = row * width
+            thresholds_row = (y & 3) << 2
+            for position in range(width):
+                if (
+                    intensities[row_start + position]
+                    > thresholds[thresholds_row | (position & 3)]
+                ):
+                    buffer[page_start + position] |= bit
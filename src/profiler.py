@@ -0,0 +1,65 @@
+from array import array
+
+from clock import ticks_us, ticks_diff
+
+
+class StageProfiler:
+    # Stage durations in microseconds. Minimum and maximum cover the whole
+    # run; average and 99th percentile are computed, on demand only, over a
+    # ring of the latest `history` durations of each stage. Recording does
+    # not allocate. Time between suspend and resume, while the stage awaits
+    # and other tasks run, is left out of its duration.
+    def __init__(self, stage_names, history: int = 128) -> None:
+        self.stage_names = stage_names
+        self.history = history
+
+        self.starts = [0] * len(stage_names)
+        self.suspend_starts = [0] * len(stage_names)
+        self.suspended = [0] * len(stage_names)
+        self.counts = [0] * len(stage_names)
+        self.minimums = array("l", [0x7FFFFFFF] * len(stage_names))
+        self.maximums = array("l", [0] * len(stage_names))
+        self.durations = array("l", [0] * (history * len(stage_names)))
+
+    def begin(self, stage: int):
+        self.suspended[stage] = 0
+        self.starts[stage] = ticks_us()
+
+    def suspend(self, stage: int):
+        self.suspend_starts[stage] = ticks_us()
+
+    def resume(self, stage: int):
+        self.suspended[stage] += ticks_diff(ticks_us(), self.suspend_starts[stage])
+
+    def end(self, stage: int):
+        duration = ticks_diff(ticks_us(), self.starts[stage]) - self.suspended[stage]
+        count = self.counts[stage]
+        self.durations[stage * self.history + count % self.history] = duration
+        self.counts[stage] = count + 1
+        if duration < self.minimums[stage]:
+            self.minimums[stage] = duration
+        if duration > self.maximums[stage]:
+            self.maximums[stage] = duration
+
+    def stage_statistics(self, stage: int):
+        # count, minimum, average, maximum, 99th percentile
+        count = self.counts[stage]
+        if not count:
+            return 0, 0, 0, 0, 0
+
+        start = stage * self.history
+        recent = sorted(self.durations[start : start + min(count, self.history)])
+        return (
+            count,
+            self.minimums[stage],
+            sum(recent) // len(recent),
+            self.maximums[stage],
+            recent[len(recent) * 99 // 100],
+        )
+
+    def dump(self):
+        print("stage: count min/avg/max/p99 us")
+        for stage, stage_name in enumerate(self.stage_names):
+            print(
+                "{}: {} {}/{}/{}/{}".format(stage_name, *self.stage_statistics(stage))
+            )
@@ -0,0 +1,62 @@
+# Compact frame format: samples are reduced to the 12 significant bits of
+# the ADC, each one is stored as the difference from the previous one (the
+# first from zero), zigzag mapped to an unsigned value and written as a
+# varint (7 bits per byte, high bit set on every byte but the last). The
+# frame starts with its sample count, also a varint. Frames of no samples
+# (zero bytes, in either format) are the padding of log blocks.
+
+
+def encoded_frame_size_bound(number_of_samples: int) -> int:
+    # 12 bit deltas zigzag to at most 13 bits, i.e. two varint bytes
+    return 3 + 2 * number_of_samples
+
+
+def write_varint(buffer, offset: int, value: int) -> int:
+    while value >= 0x80:
+        buffer[offset] = (value & 0x7F) | 0x80
+        value >>= 7
+        offset += 1
+    buffer[offset] = value
+    return offset + 1
+
+
+def encode_frame(values, buffer, offset: int) -> int:
+    number_of_samples = len(values)
+    offset = write_varint(buffer, offset, number_of_samples)
+    previous = 0
+    for index in range(number_of_samples):
+        sample = values[index] >> 4
+        delta = sample - previous
+        previous = sample
+        zigzag = delta << 1 if delta >= 0 else (-delta << 1) - 1
+        while zigzag >= 0x80:
+            buffer[offset] = (zigzag & 0x7F) | 0x80
+            zigzag >>= 7
+            offset += 1
+        buffer[offset] = zigzag
+        offset += 1
+    return offset
+
+
+def read_varint(data, offset: int):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def decode_frame(data, offset: int, values):
+    # fills values (back to the read_u16 scale), returns the number of
+    # samples and the offset of the next frame
+    number_of_samples, offset = read_varint(data, offset)
+    sample = 0
+    for index in range(number_of_samples):
+        zigzag, offset = read_varint(data, offset)
+        sample += -((zigzag + 1) >> 1) if zigzag & 1 else zigzag >> 1
+        values[index] = sample << 4
+    return number_of_samples, offset
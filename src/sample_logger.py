@@ -0,0 +1,193 @@
+import asyncio
+
+from clock import ticks_ms, ticks_diff
+
+
+def raw_frame_size(number_of_samples: int) -> int:
+    return 2 + 2 * number_of_samples
+
+
+def write_raw_frame(values, buffer, offset: int) -> int:
+    # frame record: sample count, then the samples, little endian u16 each
+    number_of_samples = len(values)
+    buffer[offset] = number_of_samples & 0xFF
+    buffer[offset + 1] = number_of_samples >> 8
+    offset += 2
+    for index in range(number_of_samples):
+        value = values[index]
+        buffer[offset] = value & 0xFF
+        buffer[offset + 1] = value >> 8
+        offset += 2
+    return offset
+
+
+class SampleLogger:
+    # Frames are copied into one of two preallocated staging blocks; a full
+    # block is handed over to the writer task, which writes it to flash in a
+    # single call while the other block fills up. Blocks are filled to the
+    # last byte, a frame running past the end going on at the start of the
+    # next block, so that files are written in whole, aligned blocks. The
+    # last block of a file is padded with zeros instead, which read as empty
+    # frames, so that every file starts with a whole frame and decodes on
+    # its own. If the writer has not finished with its block when the next
+    # one is needed, incoming frames are dropped and counted rather than
+    # waited for.
+    def __init__(
+        self,
+        number_of_samples: int,
+        path_prefix: str = "samples",
+        block_size: int = 4096,
+        max_file_size: int = 256 * 1024,
+        max_files: int = 4,
+        flush_interval_ms: int = 5000,
+        frame_writer=write_raw_frame,
+        frame_size_bound=raw_frame_size,
+    ) -> None:
+        self.path_prefix = path_prefix
+        self.block_size = block_size
+        self.max_file_size = max_file_size
+        self.max_files = max_files
+        self.flush_interval_ms = flush_interval_ms
+        self.frame_writer = frame_writer
+        self.max_frame_size = frame_size_bound(number_of_samples)
+
+        self.blocks = [bytearray(block_size), bytearray(block_size)]
+        self.fill_block = 0
+        self.fill_size = 0
+        # place of the fill block in its file, the files taking whole blocks
+        self.blocks_per_file = max(1, max_file_size // block_size)
+        self.fill_block_number = 0
+        self.pending_block = 1
+        self.pending_size = 0
+        self.block_ready = asyncio.Event()
+        # frames straddling two blocks are written here first
+        self.frame_buffer = bytearray(self.max_frame_size)
+        self.frame_view = memoryview(self.frame_buffer)
+
+        self.file = None
+        self.file_index = 0
+        self.file_size = 0
+        # part of the fill block already written at the end of the file
+        self.tail_size = 0
+        self.last_flush = ticks_ms()
+
+        self.frames_logged = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+
+    def log_frame(self, values):
+        block_size = self.block_size
+        fill_size = self.fill_size
+        if fill_size + self.max_frame_size <= block_size:
+            self.fill_size = self.frame_writer(
+                values, self.blocks[self.fill_block], fill_size
+            )
+            self.frames_logged += 1
+            return
+
+        # the frame may not fit: the next block has to be free for the rest
+        if self.pending_size:
+            self.frames_dropped += 1
+            return
+
+        frame_size = self.frame_writer(values, self.frame_buffer, 0)
+        frame_view = self.frame_view
+        room = block_size - fill_size
+        if frame_size <= room:
+            self.blocks[self.fill_block][fill_size : fill_size + frame_size] = (
+                frame_view[:frame_size]
+            )
+            self.fill_size = fill_size + frame_size
+        elif self.fill_block_number == self.blocks_per_file - 1:
+            # frames do not run on into the next file
+            block = self.blocks[self.fill_block]
+            for index in range(fill_size, block_size):
+                block[index] = 0
+            self.hand_over_block()
+            self.blocks[self.fill_block][:frame_size] = frame_view[:frame_size]
+            self.fill_size = frame_size
+        else:
+            self.blocks[self.fill_block][fill_size:] = frame_view[:room]
+            self.hand_over_block()
+            carried_size = frame_size - room
+            self.blocks[self.fill_block][:carried_size] = frame_view[room:frame_size]
+            self.fill_size = carried_size
+        self.frames_logged += 1
+
+    def hand_over_block(self):
+        self.pending_block = self.fill_block
+        self.pending_size = self.block_size
+        self.fill_block ^= 1
+        self.fill_size = 0
+        self.fill_block_number = (self.fill_block_number + 1) % self.blocks_per_file
+        self.block_ready.set()
+
+    def file_path(self, file_index: int) -> str:
+        return "{}_{}.bin".format(self.path_prefix, file_index)
+
+    def open_file(self):
+        self.file = open(self.file_path(self.file_index), "wb")
+        self.file_size = 0
+
+    def rotate_file(self):
+        # files are reused in a ring, the oldest one being overwritten
+        self.file.close()
+        self.file_index = (self.file_index + 1) % self.max_files
+        self.open_file()
+
+    def prepare_block_write(self):
+        if self.file_size + self.block_size > self.max_file_size:
+            self.rotate_file()
+        elif self.tail_size:
+            # the block goes over its partial copy
+            self.file.seek(self.file_size)
+
+    def write_block(self, block):
+        self.prepare_block_write()
+        self.file.write(block)
+        self.tail_size = 0
+        self.file_size += self.block_size
+        self.bytes_written += self.block_size
+
+    def write_tail(self):
+        # the filled part of the fill block, at the place of the whole block
+        self.prepare_block_write()
+        self.file.write(memoryview(self.blocks[self.fill_block])[: self.fill_size])
+        self.tail_size = self.fill_size
+
+    def flush(self):
+        self.file.flush()
+        self.last_flush = ticks_ms()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    async def run(self):
+        self.open_file()
+        try:
+            while True:
+                timed_out = False
+                try:
+                    await asyncio.wait_for(
+                        self.block_ready.wait(), self.flush_interval_ms / 1000
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+                self.block_ready.clear()
+
+                if self.pending_size:
+                    self.write_block(self.blocks[self.pending_block])
+                    self.pending_size = 0
+
+                if timed_out and self.fill_size > self.tail_size:
+                    # too few frames to fill a block lately: write out what
+                    # there is so that the log does not lag behind, to be
+                    # written over once the block is full
+                    self.write_tail()
+
+                if ticks_diff(ticks_ms(), self.last_flush) >= self.flush_interval_ms:
+                    self.flush()
+        finally:
+            self.close()
@@ -0,0 +1,254 @@
+import math
+from array import array
+
+from clock import sleep_us
+from sample_codec import decode_frame, encoded_frame_size_bound
+
+# Sample sources have a single method, read_into(buffer), filling the whole
+# buffer (an array('H'), or any writable sequence) with read_u16-scaled
+# samples in one call.
+
+# synthetic signals run on a 24 bit phase accumulator, whose top 8 bits
+# index a 256 entry period
+PHASE_BITS = 24
+PHASE_MASK = (1 << PHASE_BITS) - 1
+TABLE_SHIFT = PHASE_BITS - 8
+
+
+class ADCSampleSource:
+    def __init__(self, adc, sample_delay_us: int = 0, calibration=None) -> None:
+        self.adc = adc
+        self.sample_delay_us = sample_delay_us
+        self.calibration = calibration
+
+    def read_into(self, buffer):
+        read_u16 = self.adc.read_u16
+        sample_delay_us = self.sample_delay_us
+        if self.calibration is not None:
+            lut = self.calibration.lut
+            for index in range(len(buffer)):
+                buffer[index] = lut[read_u16() >> 4]
+                if sample_delay_us:
+                    sleep_us(sample_delay_us)
+            return
+
+        if not sample_delay_us:
+            for index in range(len(buffer)):
+                buffer[index] = read_u16()
+            return
+
+        for index in range(len(buffer)):
+            buffer[index] = read_u16()
+            sleep_us(sample_delay_us)
+
+
+class PeriodicSource:
+    def __init__(self, frequency: float, sample_rate: int) -> None:
+        self.phase = 0
+        self.set_frequency(frequency, sample_rate)
+
+    def set_frequency(self, frequency: float, sample_rate: int):
+        self.phase_step = int(frequency * (1 << PHASE_BITS) / sample_rate)
+
+
+class SineSource(PeriodicSource):
+    def __init__(
+        self,
+        frequency: float,
+        sample_rate: int,
+        amplitude: int = 32000,
+        offset: int = 32768,
+    ) -> None:
+        super().__init__(frequency, sample_rate)
+        self.table = array(
+            "H",
+            [
+                int(offset + amplitude * math.sin(2 * math.pi * step / 256))
+                for step in range(256)
+            ],
+        )
+
+    def read_into(self, buffer):
+        table = self.table
+        phase = self.phase
+        phase_step = self.phase_step
+        for index in range(len(buffer)):
+            buffer[index] = table[phase >> TABLE_SHIFT]
+            phase = (phase + phase_step) & PHASE_MASK
+        self.phase = phase
+
+
+class SquareSource(PeriodicSource):
+    def __init__(
+        self,
+        frequency: float,
+        sample_rate: int,
+        low: int = 8192,
+        high: int = 57344,
+        duty_cycle: float = 0.5,
+    ) -> None:
+        super().__init__(frequency, sample_rate)
+        self.low = low
+        self.high = high
+        self.high_phase = int(duty_cycle * (1 << PHASE_BITS))
+
+    def read_into(self, buffer):
+        phase = self.phase
+        phase_step = self.phase_step
+        high_phase = self.high_phase
+        high = self.high
+        low = self.low
+        for index in range(len(buffer)):
+            buffer[index] = high if phase < high_phase else low
+            phase = (phase + phase_step) & PHASE_MASK
+        self.phase = phase
+
+
+class NoiseSource:
+    # xorshift16 pseudo random values, amplitude_shift halving the spread
+    # around offset for every step
+    def __init__(self, offset: int = 32768, amplitude_shift: int = 3, seed: int = 1):
+        self.offset = offset
+        self.amplitude_shift = amplitude_shift
+        self.state = seed or 1
+
+    def read_into(self, buffer):
+        state = self.state
+        base = self.offset - (0x8000 >> self.amplitude_shift)
+        amplitude_shift = self.amplitude_shift
+        for index in range(len(buffer)):
+            state ^= (state << 7) & 0xFFFF
+            state ^= state >> 9
+            state ^= (state << 8) & 0xFFFF
+            buffer[index] = base + (state >> amplitude_shift)
+        self.state = state
+
+
+class ReplaySource:
+    # Replays a SampleLogger file (raw or sample_codec encoded frames) as a
+    # continuous sample stream, starting over at the end of the file. The
+    # file is read in chunks through a fixed buffer, so it may be far larger
+    # than the heap. Each frame is checked before it is decoded: one with
+    # more than max_frame_samples samples, or cut short by the end of the
+    # file, ends the pass over the file just as the end does.
+    def __init__(
+        self,
+        path: str,
+        raw: bool = False,
+        max_frame_samples: int = 1024,
+        chunk_size: int = 1024,
+    ) -> None:
+        self.file = open(path, "rb")
+        self.raw = raw
+        self.max_frame_samples = max_frame_samples
+        # a whole frame is buffered before decoding, unless the file ends
+        self.max_frame_size = (
+            2 + 2 * max_frame_samples
+            if raw
+            else encoded_frame_size_bound(max_frame_samples)
+        )
+        self.data = bytearray(chunk_size + self.max_frame_size)
+        self.data_view = memoryview(self.data)
+        self.data_size = 0
+        self.offset = 0
+        self.end_of_file = False
+        self.frames_in_pass = 0
+
+        self.frame = array("H", bytes(2 * max_frame_samples))
+        self.frame_length = 0
+        self.frame_position = 0
+
+    def fill(self):
+        # what is left goes to the front, the file is read on after it
+        data = self.data
+        offset = self.offset
+        left = self.data_size - offset
+        for index in range(left):
+            data[index] = data[offset + index]
+        wanted = len(data) - left
+        count = self.file.readinto(self.data_view[left:]) or 0
+        self.data_size = left + count
+        self.offset = 0
+        self.end_of_file = count < wanted
+
+    def rewind(self):
+        if not self.frames_in_pass:
+            raise ValueError("no frames to replay")
+        self.file.seek(0)
+        self.data_size = 0
+        self.offset = 0
+        self.end_of_file = False
+        self.frames_in_pass = 0
+
+    def frame_end(self) -> int:
+        # offset past the frame at self.offset, -1 when it is not whole
+        data = self.data
+        offset = self.offset
+        end = self.data_size
+        if self.raw:
+            if end - offset < 2:
+                return -1
+            number_of_samples = data[offset] | data[offset + 1] << 8
+            offset += 2 + 2 * number_of_samples
+        else:
+            number_of_samples = 0
+            shift = 0
+            while True:
+                if offset >= end:
+                    return -1
+                byte = data[offset]
+                offset += 1
+                number_of_samples |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+                if shift > 28:
+                    return -1
+            # one varint per sample, the last byte of each below 0x80
+            samples_left = min(number_of_samples, self.max_frame_samples + 1)
+            while samples_left:
+                if offset >= end:
+                    return -1
+                if data[offset] < 0x80:
+                    samples_left -= 1
+                offset += 1
+
+        if number_of_samples > self.max_frame_samples or offset > end:
+            return -1
+        return offset
+
+    def next_frame(self):
+        while True:
+            buffered = self.data_size - self.offset
+            if buffered < self.max_frame_size and not self.end_of_file:
+                self.fill()
+            frame_end = self.frame_end()
+            if frame_end < 0:
+                self.rewind()
+                continue
+
+            data = self.data
+            offset = self.offset
+            if not self.raw:
+                self.frame_length, _ = decode_frame(data, offset, self.frame)
+            else:
+                frame_length = data[offset] | data[offset + 1] << 8
+                offset += 2
+                for index in range(frame_length):
+                    self.frame[index] = data[offset] | data[offset + 1] << 8
+                    offset += 2
+                self.frame_length = frame_length
+            self.offset = frame_end
+            self.frame_position = 0
+            # empty frames are padding
+            if self.frame_length:
+                self.frames_in_pass += 1
+                return
+
+    def read_into(self, buffer):
+        frame = self.frame
+        for index in range(len(buffer)):
+            if self.frame_position >= self.frame_length:
+                self.next_frame()
+            buffer[index] = frame[self.frame_position]
+            self.frame_position += 1
@@ -28,53 +28,65 @@ SET_CHARGE_PUMP = const(0x8D)
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, defer_init=False):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        buffer_view = memoryview(self.buffer)
+        self.page_buffers = [
+            buffer_view[page * self.width : (page + 1) * self.width]
+            for page in range(self.pages)
+        ]
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
-        self.init_display()
-
-    def init_display(self):
-        for cmd in (
-            SET_DISP,  # display off
-            # address setting
-            SET_MEM_ADDR,
-            0x00,  # horizontal
-            # resolution and layout
-            SET_DISP_START_LINE,  # start at line 0
-            SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
-            SET_MUX_RATIO,
-            self.height - 1,
-            SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
-            SET_DISP_OFFSET,
-            0x00,
-            SET_COM_PIN_CFG,
-            0x02 if self.width > 2 * self.height else 0x12,
-            # timing and driving scheme
-            SET_DISP_CLK_DIV,
-            0x80,
-            SET_PRECHARGE,
-            0x22 if self.external_vcc else 0xF1,
-            SET_VCOM_DESEL,
-            0x30,  # 0.83*Vcc
-            # display
-            SET_CONTRAST,
-            0xFF,  # maximum
-            SET_ENTIRE_ON,  # output follows RAM contents
-            SET_NORM_INV,  # not inverted
-            SET_IREF_SELECT,
-            0x30,  # enable internal IREF during display on
-            # charge pump
-            SET_CHARGE_PUMP,
-            0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,  # display on
-        ):  # on
-            self.write_cmd(cmd)
-        self.fill(0)
-        self.show()
+        # with defer_init, init_display is left to the caller
+        if not defer_init:
+            self.init_display()
+
+    def init_display(self, clear=True):
+        # the whole sequence goes out in a single bus transfer
+        self.write_cmds(
+            bytes(
+                (
+                    SET_DISP,  # display off
+                    # address setting
+                    SET_MEM_ADDR,
+                    0x00,  # horizontal
+                    # resolution and layout
+                    SET_DISP_START_LINE,  # start at line 0
+                    SET_SEG_REMAP | 0x01,  # column addr 127 mapped to SEG0
+                    SET_MUX_RATIO,
+                    self.height - 1,
+                    SET_COM_OUT_DIR | 0x08,  # scan from COM[N] to COM0
+                    SET_DISP_OFFSET,
+                    0x00,
+                    SET_COM_PIN_CFG,
+                    0x02 if self.width > 2 * self.height else 0x12,
+                    # timing and driving scheme
+                    SET_DISP_CLK_DIV,
+                    0x80,
+                    SET_PRECHARGE,
+                    0x22 if self.external_vcc else 0xF1,
+                    SET_VCOM_DESEL,
+                    0x30,  # 0.83*Vcc
+                    # display
+                    SET_CONTRAST,
+                    0xFF,  # maximum
+                    SET_ENTIRE_ON,  # output follows RAM contents
+                    SET_NORM_INV,  # not inverted
+                    SET_IREF_SELECT,
+                    0x30,  # enable internal IREF during display on
+                    # charge pump
+                    SET_CHARGE_PUMP,
+                    0x10 if self.external_vcc else 0x14,
+                    SET_DISP | 0x01,  # display on
+                )
+            )
+        )
+        if clear:
+            self.fill(0)
+            self.show()
 
     def poweroff(self):
         self.write_cmd(SET_DISP)
@@ -94,6 +106,12 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_SEG_REMAP | (rotate & 1))
 
     def show(self):
+        self.show_begin()
+        self.write_data(self.buffer)
+
+    def show_begin(self):
+        # sets the full-screen address window; data may then be sent in one
+        # write or page by page (page_buffers) as the column pointer wraps
         x0 = 0
         x1 = self.width - 1
         if self.width != 128:
@@ -107,37 +125,57 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_PAGE_ADDR)
         self.write_cmd(0)
         self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
 
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(
+        self, width, height, i2c, addr=0x3C, external_vcc=False, defer_init=False
+    ):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
-        super().__init__(width, height, external_vcc)
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        super().__init__(width, height, external_vcc, defer_init)
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def write_cmds(self, cmds):
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
 
 
 class SSD1306_SPI(SSD1306):
-    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
-        self.rate = 10 * 1024 * 1024
+    def __init__(
+        self,
+        width,
+        height,
+        spi,
+        dc,
+        res,
+        cs,
+        external_vcc=False,
+        rate=10 * 1024 * 1024,
+        defer_init=False,
+    ):
+        self.rate = rate
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
+        # the bus is dedicated to the display: configure it once, not per write
+        spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.spi = spi
         self.dc = dc
         self.res = res
         self.cs = cs
+        self.cmd_buffer = bytearray(1)
         import time
 
         self.res(1)
@@ -145,19 +183,19 @@ class SSD1306_SPI(SSD1306):
         self.res(0)
         time.sleep_ms(10)
         self.res(1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, defer_init)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
+        self.cmd_buffer[0] = cmd
+        self.write_cmds(self.cmd_buffer)
+
+    def write_cmds(self, cmds):
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(cmds)
         self.cs(1)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
         self.dc(1)
         self.cs(0)
         self.spi.write(buf)
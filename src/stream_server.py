@@ -0,0 +1,114 @@
+import asyncio
+
+from sample_codec import encode_frame, encoded_frame_size_bound
+
+
+async def connect_wlan(ssid: str, password: str, timeout_ms: int = 15000):
+    import network  # type: ignore
+
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(True)
+    wlan.connect(ssid, password)
+    waited_ms = 0
+    while not wlan.isconnected():
+        if waited_ms >= timeout_ms:
+            raise OSError("wlan connection timed out")
+        await asyncio.sleep(0.1)
+        waited_ms += 100
+    return wlan.ifconfig()[0]
+
+
+class StreamClient:
+    def __init__(self, writer) -> None:
+        self.writer = writer
+        self.frame_ready = asyncio.Event()
+        self.pending_frames = 0
+
+
+class FrameStreamServer:
+    # Serves live frames over TCP. The acquisition path publishes into a
+    # single shared, already encoded frame (2 byte little endian length,
+    # then the sample_codec payload). Each client task sends the latest
+    # frame whenever its socket can take it; frames published meanwhile are
+    # skipped for that client, and a client left more than
+    # max_pending_frames behind, or whose send does not complete within
+    # send_timeout, is dropped: a slow client never holds up acquisition.
+    def __init__(
+        self,
+        number_of_samples: int,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        max_clients: int = 4,
+        max_pending_frames: int = 8,
+        send_timeout: float = 1.0,
+        wlan_ssid=None,
+        wlan_password=None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.max_pending_frames = max_pending_frames
+        self.send_timeout = send_timeout
+        self.wlan_ssid = wlan_ssid
+        self.wlan_password = wlan_password
+
+        self.frame = bytearray(2 + encoded_frame_size_bound(number_of_samples))
+        self.frame_size = 0
+        self.clients = []
+
+        self.frames_published = 0
+        self.clients_dropped = 0
+
+    def publish(self, values):
+        if not self.clients:
+            return
+
+        frame_size = encode_frame(values, self.frame, 2)
+        payload_size = frame_size - 2
+        self.frame[0] = payload_size & 0xFF
+        self.frame[1] = payload_size >> 8
+        self.frame_size = frame_size
+        self.frames_published += 1
+
+        for client in self.clients:
+            if client.frame_ready.is_set():
+                client.pending_frames += 1
+            client.frame_ready.set()
+
+    async def handle_client(self, reader, writer):
+        if len(self.clients) >= self.max_clients:
+            writer.close()
+            await writer.wait_closed()
+            return
+
+        client = StreamClient(writer)
+        self.clients.append(client)
+        try:
+            while client.pending_frames <= self.max_pending_frames:
+                await client.frame_ready.wait()
+                client.frame_ready.clear()
+                # write copies the frame, so the shared one may be replaced
+                # while the transfer is still in progress
+                writer.write(memoryview(self.frame)[: self.frame_size])
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+                if client.pending_frames:
+                    client.pending_frames -= 1
+            self.clients_dropped += 1
+        except asyncio.TimeoutError:
+            self.clients_dropped += 1
+        except OSError:
+            pass
+        finally:
+            self.clients.remove(client)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def run(self):
+        if self.wlan_ssid:
+            await connect_wlan(self.wlan_ssid, self.wlan_password)
+
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        await server.wait_closed()
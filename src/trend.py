@@ -0,0 +1,95 @@
+from array import array
+
+from clock import ticks_ms, ticks_diff
+
+TREND_SECONDS = 0
+TREND_MINUTES = 1
+TREND_HOURS = 2
+
+
+class TrendLevel:
+    # min/mean/max buckets in circular arrays; the bucket in progress is
+    # accumulated separately and stored by commit
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.minimums = array("H", bytes(2 * length))
+        self.means = array("H", bytes(2 * length))
+        self.maximums = array("H", bytes(2 * length))
+        self.stored = 0
+        self.next_index = 0
+        self.commits_since_roll_up = 0
+        self.reset_bucket()
+
+    def reset_bucket(self):
+        self.bucket_minimum = 0xFFFF
+        self.bucket_maximum = 0
+        self.bucket_sum = 0
+        self.bucket_count = 0
+
+    def add(self, minimum: int, mean: int, maximum: int):
+        if minimum < self.bucket_minimum:
+            self.bucket_minimum = minimum
+        if maximum > self.bucket_maximum:
+            self.bucket_maximum = maximum
+        self.bucket_sum += mean
+        self.bucket_count += 1
+
+    def commit(self):
+        index = self.next_index
+        self.minimums[index] = self.bucket_minimum
+        self.means[index] = self.bucket_sum // self.bucket_count
+        self.maximums[index] = self.bucket_maximum
+        self.next_index = (index + 1) % self.length
+        if self.stored < self.length:
+            self.stored += 1
+        self.commits_since_roll_up += 1
+        self.reset_bucket()
+
+    def index_for_age(self, age: int) -> int:
+        # age 0 is the most recent stored bucket
+        return (self.next_index - 1 - age) % self.length
+
+
+class TrendStore:
+    # Per-second, per-minute and per-hour aggregates of the acquisition
+    # stream, updated incrementally: every frame feeds the running second,
+    # every completed second the running minute, every 60 minutes an hour.
+    def __init__(self, seconds: int = 120, minutes: int = 120, hours: int = 48) -> None:
+        self.levels = [TrendLevel(seconds), TrendLevel(minutes), TrendLevel(hours)]
+        self.second_start = ticks_ms()
+        self.revision = 0
+
+    def add_frame(self, values):
+        minimum = 0xFFFF
+        maximum = 0
+        total = 0
+        for index in range(len(values)):
+            value = values[index]
+            if value < minimum:
+                minimum = value
+            if value > maximum:
+                maximum = value
+            total += value
+        self.levels[TREND_SECONDS].add(minimum, total // len(values), maximum)
+
+        now = ticks_ms()
+        if ticks_diff(now, self.second_start) >= 1000:
+            self.second_start = now
+            self.roll_up(TREND_SECONDS)
+
+    def roll_up(self, level_index: int):
+        level = self.levels[level_index]
+        if not level.bucket_count:
+            return
+
+        minimum = level.bucket_minimum
+        maximum = level.bucket_maximum
+        mean = level.bucket_sum // level.bucket_count
+        level.commit()
+        self.revision += 1
+
+        if level_index + 1 < len(self.levels):
+            self.levels[level_index + 1].add(minimum, mean, maximum)
+            if level.commits_since_roll_up >= 60:
+                level.commits_since_roll_up = 0
+                self.roll_up(level_index + 1)
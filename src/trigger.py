@@ -0,0 +1,32 @@
+class Trigger:
+    # Edge trigger with hysteresis: a rising edge is the first sample at or
+    # above level after one at or below level - hysteresis, a falling edge the
+    # first sample at or below level after one at or above level + hysteresis.
+    def __init__(
+        self, level: int = 32768, hysteresis: int = 1024, rising: bool = True
+    ) -> None:
+        self.level = level
+        self.hysteresis = hysteresis
+        self.rising = rising
+
+    def find(self, samples, last: int) -> int:
+        # index of the first edge in samples[0..last], -1 when there is none
+        level = self.level
+        armed = False
+        if self.rising:
+            arm_level = level - self.hysteresis
+            for index in range(last + 1):
+                value = samples[index]
+                if value <= arm_level:
+                    armed = True
+                elif armed and value >= level:
+                    return index
+        else:
+            arm_level = level + self.hysteresis
+            for index in range(last + 1):
+                value = samples[index]
+                if value >= arm_level:
+                    armed = True
+                elif armed and value <= level:
+                    return index
+        return -1
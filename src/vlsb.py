@@ -0,0 +1,24 @@
+# Direct access to MONO_VLSB frame buffers, as used by the SSD1306: the buffer
+# is a sequence of pages of `width` bytes, each byte a vertical strip of 8
+# pixels with the least significant bit on top.
+
+TOP_MASKS = bytes((0xFF << shift) & 0xFF for shift in range(8))
+BOTTOM_MASKS = bytes(0xFF >> (7 - shift) for shift in range(8))
+
+
+def fill_column_span(buffer, width: int, x: int, top: int, bottom: int, color: int):
+    # sets or clears rows top..bottom (inclusive) of column x, one byte per page
+    page = top >> 3
+    last_page = bottom >> 3
+    index = page * width + x
+    mask = TOP_MASKS[top & 7]
+    while page <= last_page:
+        if page == last_page:
+            mask &= BOTTOM_MASKS[bottom & 7]
+        if color:
+            buffer[index] |= mask
+        else:
+            buffer[index] &= ~mask
+        mask = 0xFF
+        page += 1
+        index += width
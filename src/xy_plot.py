@@ -0,0 +1,47 @@
+from array import array
+
+
+class XYPlot:
+    # Channel A against channel B. Pairs are read in one tight pass, then
+    # plotted through per axis lookup tables indexed by the top 8 bits of a
+    # sample: the column for A, the page offset and bit mask of the row for
+    # B. Each point is one OR into the MONO_VLSB buffer.
+    def __init__(
+        self,
+        left: int,
+        top: int,
+        bottom: int,
+        columns: int,
+        buffer_width: int,
+        points: int = 256,
+    ) -> None:
+        self.points = points
+        self.samples_a = array("H", bytes(2 * points))
+        self.samples_b = array("H", bytes(2 * points))
+
+        rows = bottom - top + 1
+        self.columns = bytes(left + (step * columns >> 8) for step in range(256))
+        row_for_step = [bottom - (step * rows >> 8) for step in range(256)]
+        self.row_offsets = array(
+            "H", [(row >> 3) * buffer_width for row in row_for_step]
+        )
+        self.row_masks = bytes(1 << (row & 7) for row in row_for_step)
+
+    def read_pairs(self, sample_value_reader_a, sample_value_reader_b):
+        samples_a = self.samples_a
+        samples_b = self.samples_b
+        for index in range(self.points):
+            samples_a[index] = sample_value_reader_a()
+            samples_b[index] = sample_value_reader_b()
+
+    def draw(self, buffer):
+        # the plot area is expected to have been cleared beforehand
+        samples_a = self.samples_a
+        samples_b = self.samples_b
+        columns = self.columns
+        row_offsets = self.row_offsets
+        row_masks = self.row_masks
+        for index in range(self.points):
+            step_b = samples_b[index] >> 8
+            offset = row_offsets[step_b] + columns[samples_a[index] >> 8]
+            buffer[offset] |= row_masks[step_b]
@@ -0,0 +1,78 @@
+# Host side counterpart of src/sample_codec.py: decodes the frame logs written
+# by the device (raw or encoded) and can encode frames for testing.
+import sys
+from typing import Iterator, List, Tuple
+
+
+def write_varint(output: bytearray, value: int) -> None:
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def encode_frame(values: List[int]) -> bytes:
+    output = bytearray()
+    write_varint(output, len(values))
+    previous = 0
+    for value in values:
+        sample = value >> 4
+        delta = sample - previous
+        previous = sample
+        write_varint(output, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+    return bytes(output)
+
+
+def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def decode_frame(data: bytes, offset: int) -> Tuple[List[int], int]:
+    number_of_samples, offset = read_varint(data, offset)
+    values = []
+    sample = 0
+    for _ in range(number_of_samples):
+        zigzag, offset = read_varint(data, offset)
+        sample += -((zigzag + 1) >> 1) if zigzag & 1 else zigzag >> 1
+        values.append(sample << 4)
+    return values, offset
+
+
+def decode_raw_frame(data: bytes, offset: int) -> Tuple[List[int], int]:
+    number_of_samples = int.from_bytes(data[offset : offset + 2], "little")
+    offset += 2
+    values = [
+        int.from_bytes(data[position : position + 2], "little")
+        for position in range(offset, offset + 2 * number_of_samples, 2)
+    ]
+    return values, offset + 2 * number_of_samples
+
+
+def decode_frames(data: bytes, raw: bool = False) -> Iterator[List[int]]:
+    frame_decoder = decode_raw_frame if raw else decode_frame
+    offset = 0
+    while offset < len(data):
+        values, offset = frame_decoder(data, offset)
+        # empty frames are the padding at the end of a log file
+        if values:
+            yield values
+
+
+if __name__ == "__main__":
+    # usage: python tools/sample_codec.py [--raw] samples_0.bin
+    arguments = sys.argv[1:]
+    raw_format = "--raw" in arguments
+    paths = [argument for argument in arguments if argument != "--raw"]
+
+    for path in paths:
+        with open(path, "rb") as log_file:
+            for frame in decode_frames(log_file.read(), raw=raw_format):
+                print(",".join(str(value) for value in frame))
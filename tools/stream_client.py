@@ -0,0 +1,32 @@
+# Prints the frames streamed by the device's FrameStreamServer as CSV lines.
+# usage: python tools/stream_client.py <device address> [port]
+import socket
+import sys
+
+from sample_codec import decode_frame
+
+
+def receive_exactly(connection: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("stream closed by the device")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def receive_frames(host: str, port: int):
+    with socket.create_connection((host, port)) as connection:
+        while True:
+            payload_size = int.from_bytes(receive_exactly(connection, 2), "little")
+            values, _ = decode_frame(receive_exactly(connection, payload_size), 0)
+            yield values
+
+
+if __name__ == "__main__":
+    device_host = sys.argv[1]
+    device_port = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    for frame in receive_frames(device_host, device_port):
+        print(",".join(str(value) for value in frame))
@@ -0,0 +1,127 @@
+# Checks src/stream_server.py on the host with CPython asyncio on loopback:
+# a fake sampler publishes sine frames, fast clients have to receive frames
+# decoding to published values, and a slow client with a small receive
+# buffer, which never reads, has to be dropped without holding them up.
+# usage: python tools/stream_loopback_check.py
+import asyncio
+import os
+import socket
+import sys
+from array import array
+
+# the host decoder, as used by stream_client.py
+from sample_codec import decode_frame
+
+# the device modules, whose sample_codec is the one in src/
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+del sys.modules["sample_codec"]
+from sample_source import SineSource  # noqa: E402
+from stream_server import FrameStreamServer  # noqa: E402
+
+NUMBER_OF_SAMPLES = 1000
+FAST_CLIENTS = 3
+SLOW_CLIENT_RECEIVE_BUFFER = 1024
+MIN_FRAMES_PER_FAST_CLIENT = 50
+TIMEOUT = 30.0
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def fake_sampler(server: FrameStreamServer, published: set, stop: asyncio.Event):
+    source = SineSource(frequency=50, sample_rate=20000)
+    frame = array("H", bytes(2 * NUMBER_OF_SAMPLES))
+    while not stop.is_set():
+        source.read_into(frame)
+        # the stream keeps the 12 significant bits
+        published.add(tuple(value >> 4 << 4 for value in frame))
+        server.publish(frame)
+        await asyncio.sleep(0.002)
+
+
+async def fast_client(port: int, published: set, received: list, index: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while True:
+            payload_size = int.from_bytes(await reader.readexactly(2), "little")
+            values, _ = decode_frame(await reader.readexactly(payload_size), 0)
+            if tuple(values) not in published:
+                raise AssertionError("client {} got an unpublished frame".format(index))
+            received[index] += 1
+    finally:
+        writer.close()
+
+
+async def slow_client(port: int) -> socket.socket:
+    connection = socket.socket()
+    connection.setsockopt(
+        socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_CLIENT_RECEIVE_BUFFER
+    )
+    connection.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(connection, ("127.0.0.1", port))
+    return connection
+
+
+async def check() -> None:
+    port = free_port()
+    server = FrameStreamServer(
+        number_of_samples=NUMBER_OF_SAMPLES,
+        host="127.0.0.1",
+        port=port,
+        max_clients=FAST_CLIENTS + 1,
+        max_pending_frames=4,
+        send_timeout=0.5,
+    )
+    server_task = asyncio.create_task(server.run())
+    await asyncio.sleep(0.2)
+
+    published = set()
+    received = [0] * FAST_CLIENTS
+    slow_connection = await slow_client(port)
+    client_tasks = [
+        asyncio.create_task(fast_client(port, published, received, index))
+        for index in range(FAST_CLIENTS)
+    ]
+    stop = asyncio.Event()
+    sampler_task = asyncio.create_task(fake_sampler(server, published, stop))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TIMEOUT
+    while (
+        not server.clients_dropped or min(received) < MIN_FRAMES_PER_FAST_CLIENT
+    ) and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+        for task in client_tasks:
+            if task.done():
+                task.result()
+
+    # the server notices closed clients on its next sends
+    for task in client_tasks:
+        task.cancel()
+    slow_connection.close()
+    deadline = loop.time() + TIMEOUT
+    while server.clients and loop.time() < deadline:
+        await asyncio.sleep(0.1)
+    stop.set()
+    await sampler_task
+    server_task.cancel()
+
+    print(
+        "published {} dropped clients {} frames per fast client {}".format(
+            server.frames_published, server.clients_dropped, received
+        )
+    )
+    if server.clients_dropped != 1:
+        raise AssertionError("the slow client was not dropped alone")
+    if min(received) < MIN_FRAMES_PER_FAST_CLIENT:
+        raise AssertionError("fast clients were held up")
+    print("ok")
+
+
+if __name__ == "__main__":
+    asyncio.run(check())